@@ -80,6 +80,38 @@ test('StartScreen shows server errors', () => {
   expect(screen.getByRole('alert')).toHaveTextContent('Bad request');
 });
 
+test('Find Opponent queues for a match and Cancel leaves the queue', async () => {
+  const send = vi.fn();
+  const reset = vi.fn();
+  render(
+    <MemoryRouter initialEntries={['/']}>
+      <StartScreen gameSocket={fakeSocket([], send, { reset })} />
+    </MemoryRouter>,
+  );
+  await userEvent.click(screen.getByRole('button', { name: 'Find Opponent' }));
+  expect(send).toHaveBeenCalledWith({ type: 'find_game' });
+  expect(screen.getByText('Finding an opponent...')).toBeInTheDocument();
+  expect(screen.getByRole('button', { name: 'Start New Game' })).toBeDisabled();
+  await userEvent.click(screen.getByRole('button', { name: 'Cancel' }));
+  expect(reset).toHaveBeenCalled();
+  expect(screen.getByRole('button', { name: 'Find Opponent' })).toBeInTheDocument();
+});
+
+test('StartScreen sends the chosen time control with create_game', async () => {
+  const send = vi.fn();
+  render(
+    <MemoryRouter initialEntries={['/']}>
+      <StartScreen gameSocket={fakeSocket([], send)} />
+    </MemoryRouter>,
+  );
+  await userEvent.selectOptions(screen.getByRole('combobox', { name: 'Time control' }), '10+5');
+  await userEvent.click(screen.getByRole('button', { name: 'Start New Game' }));
+  expect(send).toHaveBeenCalledWith({
+    type: 'create_game',
+    timeControl: { initialMs: 600_000, incrementMs: 5_000 },
+  });
+});
+
 const renderGameScreen = (gameId: string, socket: GameSocket) =>
   render(
     <MemoryRouter initialEntries={[`/game/${gameId}`]}>
@@ -344,3 +376,35 @@ test('GameScreen returns to the join button and shows the error when joining fai
   });
   expect(screen.getByRole('alert')).toHaveTextContent('Cannot join');
 });
+
+test('GameScreen shows the clocks of a timed game', () => {
+  setStoredRole('abc123', 'white');
+  renderGameScreen(
+    'abc123',
+    fakeSocket([
+      { type: 'game_start', color: 'white', clock: { whiteMs: 300_000, blackMs: 300_000 } },
+      {
+        type: 'move_made',
+        by: 'white',
+        from: 'Aa2',
+        to: 'Aa3',
+        clock: { whiteMs: 295_500, blackMs: 300_000 },
+      },
+    ]),
+  );
+  expect(screen.getByTestId('chess-clock')).toHaveTextContent('White 4:56');
+  expect(screen.getByTestId('chess-clock')).toHaveTextContent('Black 5:00');
+});
+
+test('GameScreen announces a loss on time', () => {
+  setStoredRole('abc123', 'white');
+  renderGameScreen(
+    'abc123',
+    fakeSocket([
+      { type: 'game_start', color: 'white', clock: { whiteMs: 1_000, blackMs: 1_000 } },
+      { type: 'game_over', reason: 'timeout', winner: 'black', clock: { whiteMs: 0, blackMs: 1_000 } },
+    ]),
+  );
+  expect(screen.getByText('Black wins on time!')).toBeInTheDocument();
+  expect(screen.getByTestId('chess-clock')).toHaveTextContent('White 0:00');
+});
@@ -1,7 +1,8 @@
 import WS from 'jest-websocket-mock';
 import { renderHook, act, waitFor } from '@testing-library/react';
+import { deflateRawSync } from 'node:zlib';
 import { vi, describe, it, expect, beforeEach, afterEach, beforeAll, afterAll } from 'vitest';
-import { useGameSocket } from './useGameSocket';
+import { SOCKET_URL, useGameSocket } from './useGameSocket';
 
 // Silence console.error for expected errors (like closing sockets)
 beforeAll(() => {
@@ -13,7 +14,7 @@ afterAll(() => {
 
 describe('useGameSocket', () => {
   let server: WS;
-  const WS_URL = 'wss://howard36--3d-chess-backend-serve.modal.run/ws';
+  const WS_URL = SOCKET_URL;
 
   beforeEach(() => {
     server = new WS(WS_URL);
@@ -152,6 +153,62 @@ describe('useGameSocket', () => {
     });
   });
 
+  it('answers heartbeat pings without adding them to the log', async () => {
+    const { result } = renderHook(() => useGameSocket());
+    await server.connected;
+    act(() => {
+      server.send(JSON.stringify({ type: 'ping' }));
+      server.send(JSON.stringify({ type: 'game_start', color: 'white' }));
+    });
+    await expect(server).toReceiveMessage(JSON.stringify({ type: 'pong' }));
+    await waitFor(() => {
+      expect(result.current.messages).toEqual([{ type: 'game_start', color: 'white' }]);
+    });
+  });
+
+  it('unpacks batched frames in order and still answers pings inside them', async () => {
+    const { result } = renderHook(() => useGameSocket());
+    await server.connected;
+    act(() => {
+      server.send(
+        JSON.stringify([
+          { type: 'game_created', gameId: 'ABC123', color: 'white' },
+          { type: 'ping' },
+          { type: 'game_start', color: 'white' },
+        ]),
+      );
+    });
+    await expect(server).toReceiveMessage(JSON.stringify({ type: 'pong' }));
+    await waitFor(() => {
+      expect(result.current.messages).toEqual([
+        { type: 'game_created', gameId: 'ABC123', color: 'white' },
+        { type: 'game_start', color: 'white' },
+      ]);
+    });
+  });
+
+  it('inflates compressed frames without reordering the frames behind them', async () => {
+    const { result } = renderHook(() => useGameSocket());
+    await server.connected;
+    const state = {
+      type: 'game_state',
+      color: 'white',
+      started: true,
+      moves: Array.from({ length: 100 }, () => ({ by: 'white', from: 'Ab1', to: 'Ac3' })),
+    };
+    const compressed = deflateRawSync(JSON.stringify(state));
+    act(() => {
+      server.send(compressed.buffer.slice(compressed.byteOffset, compressed.byteOffset + compressed.length));
+      server.send(JSON.stringify({ type: 'move_made', by: 'black', from: 'Ee4', to: 'Ee3' }));
+    });
+    await waitFor(() => {
+      expect(result.current.messages).toEqual([
+        state,
+        { type: 'move_made', by: 'black', from: 'Ee4', to: 'Ee3' },
+      ]);
+    });
+  });
+
   it('reset() drops the session messages and opens a fresh connection', async () => {
     const { result } = renderHook(() => useGameSocket());
     await server.connected;
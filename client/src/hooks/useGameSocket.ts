@@ -4,6 +4,26 @@ import type { WebSocketMessage } from '../types/messages';
 const WS_URL: string =
   import.meta.env.VITE_WS_URL ?? 'wss://howard36--3d-chess-backend-serve.modal.run/ws';
 
+/**
+ * Large frames (a long game's history on rejoin) arrive compressed when the
+ * browser can inflate them, and everything the server has queued for this
+ * socket in one tick arrives as one frame: a JSON array of messages.
+ */
+export const SOCKET_URL =
+  WS_URL +
+  (WS_URL.includes('?') ? '&' : '?') +
+  'batch=1' +
+  (typeof DecompressionStream !== 'undefined' ? '&compress=deflate-raw' : '');
+
+/** Inflate a binary frame: raw-DEFLATE-compressed JSON. */
+const inflate = (data: ArrayBuffer): Promise<string> => {
+  const stream = new DecompressionStream('deflate-raw');
+  const writer = stream.writable.getWriter();
+  void writer.write(new Uint8Array(data));
+  void writer.close();
+  return new Response(stream.readable).text();
+};
+
 /** Delay before reconnect attempt n (0-based): 0.5s, 1s, 2s, 4s, then 8s forever. */
 const reconnectDelayMs = (attempt: number) => Math.min(500 * 2 ** attempt, 8000);
 
@@ -77,8 +97,12 @@ export function useGameSocket(): GameSocket {
     let retryTimer: ReturnType<typeof setTimeout> | undefined;
 
     const connect = () => {
-      const ws = new WebSocket(WS_URL);
+      const ws = new WebSocket(SOCKET_URL);
+      ws.binaryType = 'arraybuffer';
       socketRef.current = ws;
+      // Set while a binary frame is being inflated; frames behind it wait
+      // their turn so messages stay in arrival order.
+      let inflating: Promise<void> | null = null;
 
       ws.onopen = () => {
         if (disposed || socketRef.current !== ws) return;
@@ -100,11 +124,10 @@ export function useGameSocket(): GameSocket {
         }
       };
 
-      ws.onmessage = (event) => {
-        hasActivityRef.current = true;
-        let parsed: WebSocketMessage;
+      const handleFrame = (text: string) => {
+        let parsed: WebSocketMessage | WebSocketMessage[];
         try {
-          parsed = JSON.parse(event.data) as WebSocketMessage;
+          parsed = JSON.parse(text) as WebSocketMessage | WebSocketMessage[];
         } catch {
           // The server only sends schema-conformant JSON; a parse failure is a
           // protocol violation. Surface it like any server error instead of
@@ -115,8 +138,37 @@ export function useGameSocket(): GameSocket {
             message: 'Received a malformed message from the server',
           };
         }
-        messageCountRef.current += 1;
-        setMessages((prev) => [...prev, parsed]);
+        const received: WebSocketMessage[] = [];
+        for (const msg of Array.isArray(parsed) ? parsed : [parsed]) {
+          // Heartbeat probes are transport plumbing, not game events: answer
+          // them here so the server keeps this socket, and keep them out of the
+          // log so an idle game doesn't re-render on every ping.
+          if (msg.type === 'ping') {
+            ws.send(JSON.stringify({ type: 'pong' }));
+          } else {
+            received.push(msg);
+          }
+        }
+        if (received.length === 0) return;
+        hasActivityRef.current = true;
+        messageCountRef.current += received.length;
+        setMessages((prev) => [...prev, ...received]);
+      };
+
+      ws.onmessage = (event) => {
+        const data = event.data as string | ArrayBuffer;
+        if (typeof data === 'string' && inflating === null) {
+          handleFrame(data);
+          return;
+        }
+        const current: Promise<void> = (inflating ?? Promise.resolve())
+          .then(() => (typeof data === 'string' ? data : inflate(data)))
+          // A frame that fails to inflate is malformed like bad JSON is
+          .then(handleFrame, () => handleFrame(''));
+        inflating = current;
+        void current.then(() => {
+          if (inflating === current) inflating = null;
+        });
       };
 
       ws.onclose = () => {
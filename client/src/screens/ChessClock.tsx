@@ -0,0 +1,76 @@
+import React from 'react';
+import type { Clock, Color } from '../types/messages';
+
+export interface ChessClockProps {
+  /** The server's latest reading, as of `receivedAt`. */
+  clock: Clock;
+  /** Date.now() when that reading arrived. */
+  receivedAt: number;
+  /** The side whose clock is running, or null when both are stopped. */
+  running: Color | null;
+}
+
+export const formatClock = (ms: number) => {
+  const totalSeconds = Math.ceil(Math.max(0, ms) / 1000);
+  const minutes = Math.floor(totalSeconds / 60);
+  const seconds = totalSeconds % 60;
+  return `${minutes}:${seconds.toString().padStart(2, '0')}`;
+};
+
+/**
+ * Both players' remaining time. The server is authoritative (it flags a
+ * player whose time runs out); this only counts the running side down
+ * locally between the readings that arrive with every move.
+ */
+const ChessClock: React.FC<ChessClockProps> = ({ clock, receivedAt, running }) => {
+  const [now, setNow] = React.useState(() => Date.now());
+
+  React.useEffect(() => {
+    if (!running) return;
+    const timer = setInterval(() => setNow(Date.now()), 250);
+    return () => clearInterval(timer);
+  }, [running]);
+
+  const elapsed = running ? Math.max(0, now - receivedAt) : 0;
+  const whiteMs = clock.whiteMs - (running === 'white' ? elapsed : 0);
+  const blackMs = clock.blackMs - (running === 'black' ? elapsed : 0);
+
+  const side = (label: string, ms: number, active: boolean) => (
+    <div
+      style={{
+        padding: '4px 12px',
+        borderRadius: '6px',
+        backgroundColor: active ? 'rgba(255,255,255,0.9)' : 'transparent',
+        color: active ? '#222' : 'white',
+        fontWeight: active ? 700 : 400,
+      }}
+    >
+      {label} {formatClock(ms)}
+    </div>
+  );
+
+  return (
+    <div
+      data-testid="chess-clock"
+      aria-label="Clocks"
+      style={{
+        position: 'absolute',
+        top: '64px',
+        left: '10px',
+        display: 'flex',
+        gap: '8px',
+        padding: '6px',
+        backgroundColor: 'rgba(0,0,0,0.7)',
+        borderRadius: '8px',
+        fontFamily: 'ui-monospace, SFMono-Regular, Menlo, monospace',
+        fontSize: '18px',
+        zIndex: 1000,
+      }}
+    >
+      {side('White', whiteMs, running === 'white')}
+      {side('Black', blackMs, running === 'black')}
+    </div>
+  );
+};
+
+export default ChessClock;
@@ -2,7 +2,7 @@ import React from 'react';
 import { useNavigate } from 'react-router-dom';
 
 interface EndGameModalProps {
-  result: 'checkmate' | 'stalemate';
+  result: 'checkmate' | 'stalemate' | 'timeout';
   winner?: 'white' | 'black';
 }
 
@@ -15,6 +15,10 @@ const EndGameModal: React.FC<EndGameModalProps> = ({ result, winner }) => {
       : 'Checkmate!';
   } else if (result === 'stalemate') {
     message = 'Draw by stalemate!';
+  } else if (result === 'timeout') {
+    message = winner
+      ? `${winner.charAt(0).toUpperCase() + winner.slice(1)} wins on time!`
+      : 'Time is up!';
   }
   return (
     <div
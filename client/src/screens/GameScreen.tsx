@@ -7,9 +7,12 @@ import { OrbitControls } from '@react-three/drei';
 import TurnIndicator from '../three/TurnIndicator';
 import { Board as EngineBoard, Move } from '../engine';
 import { moveFromMessage, moveToMessage } from '../engine/protocol';
+import ChessClock from './ChessClock';
 import EndGameModal from './EndGameModal';
 import MoveList from './MoveList';
 import type {
+  Clock,
+  GameOver,
   GameStart,
   GameState,
   MoveMade,
@@ -139,8 +142,28 @@ const GameScreen: React.FC<GameScreenProps> = ({ gameSocket }) => {
     return { move, moveCount: appliedMoveCount, capturedPiece: prevBoard.getPiece(move.to) };
   }, [moveRecords, appliedMoveCount, prevBoard]);
 
+  // Timed games: the server sends a clock reading with game_start,
+  // game_state and every move_made, and game_over when a flag falls.
+  const timeout = React.useMemo(
+    () => messages.find((m): m is GameOver => m.type === 'game_over'),
+    [messages],
+  );
+  const latestClock = React.useMemo((): null | { index: number; clock: Clock } => {
+    for (let i = messages.length - 1; i >= 0; i--) {
+      const m = messages[i];
+      if ('clock' in m && m.clock) return { index: i, clock: m.clock };
+    }
+    return null;
+  }, [messages]);
+  // When that reading arrived, so the running side can count down from it
+  const [clockReceivedAt, setClockReceivedAt] = React.useState(() => Date.now());
+  const latestClockIndex = latestClock?.index ?? -1;
+  React.useEffect(() => {
+    setClockReceivedAt(Date.now());
+  }, [latestClockIndex]);
+
   const gameOver = React.useMemo((): null | {
-    result: 'checkmate' | 'stalemate';
+    result: 'checkmate' | 'stalemate' | 'timeout';
     winner?: 'white' | 'black';
   } => {
     if (replayFailedAt !== null) return null;
@@ -150,8 +173,11 @@ const GameScreen: React.FC<GameScreenProps> = ({ gameSocket }) => {
     if (board.isStalemate(currentTurn)) {
       return { result: 'stalemate' };
     }
+    if (timeout) {
+      return { result: 'timeout', winner: timeout.winner };
+    }
     return null;
-  }, [board, currentTurn, replayFailedAt]);
+  }, [board, currentTurn, replayFailedAt, timeout]);
 
   const errors = React.useMemo(
     () => messages.filter((m): m is ServerError => m.type === 'error'),
@@ -299,6 +325,13 @@ const GameScreen: React.FC<GameScreenProps> = ({ gameSocket }) => {
         )}
         {/* Turn indicator */}
         <TurnIndicator turn={currentTurn} />
+        {latestClock && (
+          <ChessClock
+            clock={latestClock.clock}
+            receivedAt={clockReceivedAt}
+            running={gameOver || replayFailedAt !== null ? null : currentTurn}
+          />
+        )}
         <MoveList moves={moveRecords} />
         {/* Main 3D Board canvas */}
         {/* Camera sits mostly on +Z (up and to the right), so the whole 5x5x5
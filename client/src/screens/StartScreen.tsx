@@ -1,9 +1,16 @@
 import React from 'react';
 import { useNavigate } from 'react-router-dom';
-import type { GameCreated, Error as ServerError } from '../types/messages';
+import type { GameCreated, TimeControl, Error as ServerError } from '../types/messages';
 import type { GameSocket } from '../hooks/useGameSocket';
 import { setStoredRole } from '../lib/playerRole';
 
+// Offered time controls, by label ("minutes+increment seconds")
+const TIME_CONTROLS: Record<string, TimeControl> = {
+  '5+0': { initialMs: 5 * 60_000, incrementMs: 0 },
+  '10+5': { initialMs: 10 * 60_000, incrementMs: 5_000 },
+  '30+0': { initialMs: 30 * 60_000, incrementMs: 0 },
+};
+
 interface StartScreenProps {
   gameSocket: GameSocket;
 }
@@ -11,6 +18,9 @@ interface StartScreenProps {
 const StartScreen: React.FC<StartScreenProps> = ({ gameSocket }) => {
   const navigate = useNavigate();
   const [isLoading, setIsLoading] = React.useState(false);
+  const [isSearching, setIsSearching] = React.useState(false);
+  // '' means an untimed game
+  const [timeControl, setTimeControl] = React.useState('');
 
   const gameCreated = gameSocket.messages.find(
     (m): m is GameCreated => m.type === 'game_created',
@@ -29,7 +39,25 @@ const StartScreen: React.FC<StartScreenProps> = ({ gameSocket }) => {
 
   const handleCreateGame = () => {
     setIsLoading(true);
-    gameSocket.send({ type: 'create_game' });
+    gameSocket.send(
+      timeControl
+        ? { type: 'create_game', timeControl: TIME_CONTROLS[timeControl] }
+        : { type: 'create_game' },
+    );
+  };
+
+  // A match arrives as game_created + game_start, so the effect above
+  // navigates just as it does for a created game.
+  const handleFindGame = () => {
+    setIsSearching(true);
+    gameSocket.send({ type: 'find_game' });
+  };
+
+  // The server drops a socket from the queue when it closes, so cancelling
+  // is just starting a fresh connection.
+  const handleCancelSearch = () => {
+    setIsSearching(false);
+    gameSocket.reset();
   };
 
   return (
@@ -38,11 +66,47 @@ const StartScreen: React.FC<StartScreenProps> = ({ gameSocket }) => {
         <h1 className="text-6xl font-bold text-white tracking-wide">3D Chess</h1>
         <button
           onClick={handleCreateGame}
-          disabled={isLoading}
+          disabled={isLoading || isSearching}
           className="py-3 px-6 text-2xl font-semibold text-gray-900 bg-white rounded-xl hover:bg-gray-100 focus:outline-none focus:ring-4 focus:ring-blue-500 focus:ring-opacity-50 disabled:opacity-50 disabled:cursor-not-allowed transition-all duration-200 transform hover:scale-105"
         >
           {isLoading ? 'Creating Game...' : 'Start New Game'}
         </button>
+        <label className="flex items-center gap-3 text-lg text-gray-300">
+          Clock
+          <select
+            aria-label="Time control"
+            value={timeControl}
+            onChange={(e) => setTimeControl(e.target.value)}
+            disabled={isLoading || isSearching}
+            className="py-1 px-2 text-gray-900 rounded-lg"
+          >
+            <option value="">None</option>
+            {Object.keys(TIME_CONTROLS).map((label) => (
+              <option key={label} value={label}>
+                {label}
+              </option>
+            ))}
+          </select>
+        </label>
+        {isSearching ? (
+          <div className="flex items-center gap-4">
+            <p className="text-lg text-gray-300">Finding an opponent...</p>
+            <button
+              onClick={handleCancelSearch}
+              className="py-1 px-3 text-lg text-gray-300 border border-gray-500 rounded-lg hover:bg-gray-800"
+            >
+              Cancel
+            </button>
+          </div>
+        ) : (
+          <button
+            onClick={handleFindGame}
+            disabled={isLoading}
+            className="py-2 px-5 text-xl font-semibold text-white border-2 border-white rounded-xl hover:bg-gray-800 focus:outline-none focus:ring-4 focus:ring-blue-500 focus:ring-opacity-50 disabled:opacity-50 disabled:cursor-not-allowed transition-all duration-200"
+          >
+            Find Opponent
+          </button>
+        )}
         {latestError && (
           <p role="alert" className="text-red-400 text-lg">
             Error: {latestError.message}
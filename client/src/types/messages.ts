@@ -15,9 +15,16 @@ export type {
   MoveMade,
   MoveRecord,
   Error,
+  Ping,
+  Pong,
+  FindGame,
+  GameOver,
+  TimeControl,
+  Clock,
   Color,
   Promotion,
   ErrorCode,
+  GameOverReason,
 } from './schema';
 
 export type { WebSocketV1MessageEnvelope as WebSocketMessage } from './schema';
@@ -14,7 +14,11 @@ export type WebSocketV1MessageEnvelope =
   | GameState
   | Move
   | MoveMade
-  | Error;
+  | Error
+  | Ping
+  | Pong
+  | FindGame
+  | GameOver;
 export type Color = "white" | "black";
 export type Promotion = "Q" | "R" | "B" | "N" | "U";
 export type ErrorCode =
@@ -25,10 +29,18 @@ export type ErrorCode =
   | "invalid_rejoin"
   | "invalid_move"
   | "game_not_started"
-  | "wrong_turn";
+  | "wrong_turn"
+  | "rate_limited"
+  | "game_over";
+export type GameOverReason = "timeout";
 
 export interface CreateGame {
   type: "create_game";
+  timeControl?: TimeControl;
+}
+export interface TimeControl {
+  initialMs: number;
+  incrementMs: number;
 }
 export interface GameCreated {
   type: "game_created";
@@ -48,12 +60,19 @@ export interface GameStart {
   type: "game_start";
   color: Color;
   initialPosition?: string;
+  clock?: Clock;
+}
+export interface Clock {
+  whiteMs: number;
+  blackMs: number;
 }
 export interface GameState {
   type: "game_state";
   color: Color;
   started: boolean;
   moves: MoveRecord[];
+  timeControl?: TimeControl;
+  clock?: Clock;
 }
 export interface MoveRecord {
   by: Color;
@@ -73,9 +92,25 @@ export interface MoveMade {
   from: string;
   to: string;
   promotion?: Promotion;
+  clock?: Clock;
 }
 export interface Error {
   type: "error";
   code: ErrorCode;
   message: string;
 }
+export interface Ping {
+  type: "ping";
+}
+export interface Pong {
+  type: "pong";
+}
+export interface FindGame {
+  type: "find_game";
+}
+export interface GameOver {
+  type: "game_over";
+  reason: GameOverReason;
+  winner: Color;
+  clock?: Clock;
+}
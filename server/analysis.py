@@ -0,0 +1,97 @@
+"""Position analysis for the HTTP API: legal moves, check status, evaluation.
+
+The expensive part (move generation plus a one-ply search) runs in a worker
+process so it can't stall the event loop every websocket shares. Requests
+are keyed by the position's Zobrist hash: identical positions in flight at
+the same time — a room full of spectators asking about the current ply —
+share one computation, and finished results sit in an LRU cache.
+"""
+
+import asyncio
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from evaluation import MATE, evaluate, evaluate_batch
+from rules import apply_move, in_check, legal_moves, move_to_record, opponent, position_hash
+
+
+def analyze_position(board_text: str, side: str) -> dict:
+    """Analyze one position; runs in a worker process.
+
+    ``evaluation`` is the static score; ``bestMove`` is the move whose
+    resulting position scores best for ``side`` (checkmates first).
+    """
+    board = list(board_text)
+    moves = legal_moves(board, side)
+    checked = in_check(board, side)
+    sign = 1 if side == "white" else -1
+    reply = opponent(side)
+    children = [apply_move(board, move) for move in moves]
+    # The whole frontier is scored in one batch; mates override the score
+    scores = [sign * score for score in evaluate_batch(children)]
+    for i, child in enumerate(children):
+        if in_check(child, reply) and not legal_moves(child, reply):
+            scores[i] = MATE
+    best = max(range(len(moves)), key=scores.__getitem__, default=None)
+    best_move = moves[best] if best is not None else None
+    return {
+        "sideToMove": side,
+        "inCheck": checked,
+        "checkmate": checked and not moves,
+        "stalemate": not checked and not moves,
+        "evaluation": evaluate(board),
+        "bestMove": move_to_record(best_move, side) if best_move else None,
+        "legalMoves": [move_to_record(m, side) for m in moves],
+    }
+
+
+class Analyzer:
+    """Coalescing, caching front end to analyze_position."""
+
+    def __init__(self, executor: Executor | None = None, cache_size: int = 4096, workers: int = 2):
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._workers = workers
+        self._cache: OrderedDict[int, dict] = OrderedDict()
+        self._cache_size = cache_size
+        self._pending: dict[int, asyncio.Future] = {}
+        self.computed = 0  # positions actually analyzed, for tests and metrics
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # Spawn, not fork: the parent has an event loop and server threads
+            # that a forked child must not inherit half-way through.
+            self._executor = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def analyze(self, board: list[str], side: str) -> dict:
+        key = position_hash(board, side)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._compute(key, "".join(board), side))
+            self._pending[key] = pending
+        # Shielded so one caller going away doesn't cancel the work the
+        # other waiters are sharing.
+        return await asyncio.shield(pending)
+
+    async def _compute(self, key: int, board_text: str, side: str) -> dict:
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), analyze_position, board_text, side)
+            self.computed += 1
+            self._cache[key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            return result
+        finally:
+            del self._pending[key]
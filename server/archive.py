@@ -0,0 +1,136 @@
+"""Stream game records out of the store into a compressed archive, and back.
+
+The live store forgets games after Modal's inactivity TTL; an archive keeps
+them for analysis. Both directions are generator pipelines — one record is in
+memory at a time (plus one import batch), however large the store is.
+
+Archive format: gzip-compressed JSON lines, one game per line:
+
+    {"id": "K3X9QZ", "seats": ["white", "black"], "moves": "Aa2Aa3 Ea4Ea3 Bb4Bb5Q"}
+
+Moves use a compact notation: from-square + to-square + optional promotion
+letter, space separated. The mover is implied by ply parity (the server only
+ever records alternating moves, white first), so "by" is not stored.
+Games played with a time control also carry their "clock" object as is (see
+clocks.py), so an imported game keeps its time control and banked time.
+
+Usage (against the deployed store; needs Modal credentials):
+
+    python archive.py export games.jsonl.gz
+    python archive.py import games.jsonl.gz
+"""
+
+import argparse
+import gzip
+import json
+from typing import Iterable, Iterator
+
+
+def encode_moves(moves: list[dict]) -> str:
+    return " ".join(m["from"] + m["to"] + m.get("promotion", "") for m in moves)
+
+
+def decode_moves(text: str) -> list[dict]:
+    moves = []
+    for i, token in enumerate(text.split()):
+        move = {"by": "white" if i % 2 == 0 else "black", "from": token[:3], "to": token[3:6]}
+        if len(token) > 6:
+            move["promotion"] = token[6:]
+        moves.append(move)
+    return moves
+
+
+def iter_records(store) -> Iterator[tuple[str, dict]]:
+    """Yield (game id, record) pairs without materializing the store.
+
+    modal.Dict.items() streams from the backend; a plain dict works the same.
+    """
+    yield from store.items()
+
+
+def encode_record(gid: str, record: dict) -> str:
+    row = {"id": gid, "seats": record["seats"], "moves": encode_moves(record["moves"])}
+    if "clock" in record:
+        row["clock"] = record["clock"]
+    return json.dumps(row, separators=(",", ":"))
+
+
+def decode_record(line: str) -> tuple[str, dict]:
+    row = json.loads(line)
+    record = {"seats": row["seats"], "moves": decode_moves(row["moves"])}
+    if "clock" in row:
+        record["clock"] = row["clock"]
+    return row["id"], record
+
+
+def write_archive(records: Iterable[tuple[str, dict]], path: str) -> int:
+    """Write (game id, record) pairs to ``path``; returns the number written."""
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for gid, record in records:
+            f.write(encode_record(gid, record))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def read_lines(path: str) -> Iterator[str]:
+    """Yield an archive's encoded records without decoding them."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def read_archive(path: str) -> Iterator[tuple[str, dict]]:
+    """Yield (game id, record) pairs from an archive, one line at a time."""
+    for line in read_lines(path):
+        yield decode_record(line)
+
+
+def export_archive(store, path: str) -> int:
+    return write_archive(iter_records(store), path)
+
+
+def import_archive(path: str, store, *, overwrite: bool = False, batch_size: int = 500) -> int:
+    """Bulk-load an archive into ``store``; returns the number of records written.
+
+    Existing games are skipped unless ``overwrite`` is set: an archived copy
+    is never newer than a live record, and clobbering one would drop moves.
+    Writes go out in batches so a modal.Dict pays one round trip per batch.
+    """
+    written = 0
+    batch: dict[str, dict] = {}
+    for gid, record in read_archive(path):
+        if not overwrite and gid in store:
+            continue
+        batch[gid] = record
+        if len(batch) >= batch_size:
+            store.update(batch)
+            written += len(batch)
+            batch = {}
+    if batch:
+        store.update(batch)
+        written += len(batch)
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path")
+    parser.add_argument("--overwrite", action="store_true", help="import: replace games already in the store")
+    args = parser.parse_args(argv)
+
+    import modal
+    from modal_app import STORE_NAME
+
+    store = modal.Dict.from_name(STORE_NAME, create_if_missing=True)
+    if args.command == "export":
+        print(f"exported {export_archive(store, args.path)} games to {args.path}")
+    else:
+        print(f"imported {import_archive(args.path, store, overwrite=args.overwrite)} games from {args.path}")
+
+
+if __name__ == "__main__":
+    main()
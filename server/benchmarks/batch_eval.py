@@ -0,0 +1,73 @@
+"""Evaluation throughput: scalar evaluate() against the NumPy batch path.
+
+Run from server/:
+
+    python -m benchmarks.batch_eval
+    python -m benchmarks.batch_eval --games 200 --batch-sizes 1 32 256 4096
+
+Positions come from seeded random games, so runs are comparable. Each line
+reports positions per second; "encoded" times evaluate_encoded() on an
+already-encoded array, i.e. the cost a searcher that keeps positions as
+arrays would pay.
+"""
+
+import argparse
+import random
+import time
+
+import evaluation
+from evaluation import evaluate, evaluate_batch
+from rules import apply_move, legal_moves, opponent, starting_position
+
+
+def sample_positions(games: int, plies: int = 60, seed: int = 1) -> list[list[str]]:
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(games):
+        board, side = starting_position(), "white"
+        for _ in range(plies):
+            moves = legal_moves(board, side)
+            if not moves:
+                break
+            board = apply_move(board, rng.choice(moves))
+            side = opponent(side)
+            positions.append(board)
+    return positions
+
+
+def throughput(fn, count: int, repeat: int = 3) -> float:
+    """Best-of-``repeat`` positions per second for ``fn()`` scoring ``count``."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return count / best
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 128, 1024, 4096])
+    args = parser.parse_args(argv)
+
+    positions = sample_positions(args.games)
+    n = len(positions)
+    print(f"{n} positions from {args.games} random games")
+    print(f"  scalar evaluate()         {throughput(lambda: [evaluate(p) for p in positions], n):>10,.0f} pos/s")
+    if evaluation.np is None:
+        print("  numpy is not installed; evaluate_batch() falls back to the scalar path")
+        return
+    for size in args.batch_sizes:
+
+        def run(size=size):
+            for i in range(0, n, size):
+                evaluate_batch(positions[i : i + size])
+
+        print(f"  evaluate_batch(size={size:<5}) {throughput(run, n):>10,.0f} pos/s")
+    codes = evaluation.encode_boards(positions)
+    print(f"  evaluate_encoded()        {throughput(lambda: evaluation.evaluate_encoded(codes), n):>10,.0f} pos/s")
+
+
+if __name__ == "__main__":
+    main()
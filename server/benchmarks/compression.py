@@ -0,0 +1,73 @@
+"""Outbound frame compression: bytes saved and CPU spent, per level.
+
+Run from server/:
+
+    python -m benchmarks.compression
+    python -m benchmarks.compression --plies 40 200 800 --levels 1 6 9
+
+Frames are the game_state a rejoining player receives for seeded random
+games of each length, plus a typical move_made. Each line reports the
+encoded size, the compressed size at each level and the microseconds one
+compression takes; a frame under the threshold is sent as-is, so its cost
+is the "raw" column only.
+"""
+
+import argparse
+import random
+import time
+
+from outbox import deflate, encode_frame
+from rules import apply_move, legal_moves, move_to_record, opponent, starting_position
+
+
+def random_history(plies: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    board, side, moves = starting_position(), "white", []
+    while len(moves) < plies:
+        legal = legal_moves(board, side)
+        if not legal:
+            board, side = starting_position(), "white"
+            continue
+        move = rng.choice(legal)
+        moves.append(move_to_record(move, side))
+        board = apply_move(board, move)
+        side = opponent(side)
+    return moves
+
+
+def best_us(fn, repeat: int = 50) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plies", type=int, nargs="+", default=[20, 100, 400, 1600])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+    args = parser.parse_args(argv)
+
+    history = random_history(max(args.plies))
+    frames = [("move_made", {"type": "move_made", **history[0]})]
+    for plies in args.plies:
+        state = {"type": "game_state", "color": "white", "started": True, "moves": history[:plies]}
+        frames.append((f"game_state {plies} plies", state))
+
+    header = "".join(f"  level {level:<13}" for level in args.levels)
+    print(f"{'frame':<24}{'raw, json.dumps':<17}{header}")
+    for name, payload in frames:
+        text = encode_frame([payload])
+        cells = []
+        for level in args.levels:
+            size = len(deflate(text, level))
+            us = best_us(lambda: deflate(text, level))
+            cells.append(f"  {size:>6} B {us:>7.1f} µs")
+        encode_us = best_us(lambda: encode_frame([payload]))
+        print(f"{name:<24}{len(text):>6} B {encode_us:>5.1f} µs{''.join(cells)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Startup cost of the server: import-time profile and time to first /health.
+
+Run from server/:
+
+    python -m benchmarks.startup            # profile + 5 cold starts
+    python -m benchmarks.startup --runs 20
+
+The import profile is ``python -X importtime`` for ``import modal_app``,
+sorted by cumulative time, so the heaviest import subtrees come first. The
+cold-start timing launches uvicorn the way the local dev setup does and
+polls /health until it answers, which is the closest local stand-in for a
+Modal cold start's first request.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(top: int = 15) -> list[tuple[int, int, str]]:
+    """Return (cumulative µs, self µs, module) for the slowest imports."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import modal_app"],
+        cwd=SERVER_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_health(timeout: float = 30.0) -> float:
+    """Seconds from launching uvicorn to the first successful /health."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "modal_app:create_web_app", "--factory", "--port", str(port)],
+        cwd=SERVER_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"/health did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    print("slowest imports (cumulative ms, self ms):")
+    for cumulative_us, self_us, name in import_profile(args.top):
+        print(f"  {cumulative_us / 1000:8.1f} {self_us / 1000:8.1f}  {name}")
+
+    samples = [time_to_health() for _ in range(args.runs)]
+    print(
+        f"time to first /health over {args.runs} runs: "
+        f"median {statistics.median(samples) * 1000:.0f} ms, "
+        f"min {min(samples) * 1000:.0f} ms, max {max(samples) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""Seeded fuzzing of the websocket state machine, with a throughput report.
+
+Run from server/:
+
+    python -m benchmarks.ws_fuzz
+    python -m benchmarks.ws_fuzz --seed 7 --clients 200 --rounds 300 --store-latency-ms 0.2
+
+Simulated clients connect, create, join, rejoin, search for, play and
+abandon games against create_web_app() in-process, through its ASGI
+interface, with no network and no TestClient threads. Every choice comes
+from the seed: the same seed replays the same run, message for message, so
+a failure is reproduced by re-running its seed.
+
+Interleavings are where the write-before-await rule can break, so every
+send and receive on every socket yields to the event loop a random number
+of times (a socket still delivers in order, like a real one); the store (LatentStore) behaves like a modal.Dict, handing
+out copies, so a handler that mutates a record without writing it back
+before awaiting loses the write, just as it would in production. Store
+calls are synchronous in modal_app, so the injected store latency blocks
+the loop like a real round trip; it costs throughput, not ordering.
+
+After the run every socket is closed and the invariants are checked:
+
+- every move a client saw (move_made, or game_state history) is in the
+  stored game at the ply the client saw it — no lost, duplicated or
+  reordered moves;
+- stored moves alternate white, black, white, ...;
+- seats are claimed at most once per color;
+- no handler raised, and no error code outside the expected ones was sent;
+- the live-socket maps (connections, game_buckets, game_boards,
+  match_queue, outboxes) are empty.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import copy
+import hashlib
+import json
+import random
+import time
+import zlib
+from typing import NamedTuple
+
+import modal_app
+from instrumentation import Instrumentation
+from modal_app import create_web_app
+
+# Refusals a client can earn by acting on a stale view; anything else is a bug
+EXPECTED_ERRORS = {
+    "already_in_game",
+    "invalid_game",
+    "game_full",
+    "invalid_rejoin",
+    "invalid_move",
+    "game_not_started",
+    "wrong_turn",
+}
+# Each side shuttles a knight out and back, so a client with an up-to-date
+# view always sends a legal move.
+SHUFFLES = {"white": [("Ab1", "Ac3"), ("Ac3", "Ab1")], "black": [("Eb5", "Ec3"), ("Ec3", "Eb5")]}
+MAX_YIELDS = 4
+
+
+class InvariantError(AssertionError):
+    pass
+
+
+class FuzzReport(NamedTuple):
+    seed: int
+    games: int
+    moves: int
+    frames_in: int  # client -> server
+    messages_out: int  # server -> client
+    seconds: float
+    digest: str  # of the final store; equal for equal seeds
+
+    def __str__(self) -> str:
+        return (
+            f"seed {self.seed}: {self.games} games, {self.moves} moves, {self.frames_in} frames in, "
+            f"{self.messages_out} messages out in {self.seconds:.2f}s "
+            f"({self.frames_in / self.seconds:,.0f} frames/s in, {self.messages_out / self.seconds:,.0f} messages/s out)"
+        )
+
+
+class LatentStore:
+    """A dict with modal.Dict's semantics: values are copied on the way in and
+    out, and every call blocks for ``latency`` seconds."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.data: dict = {}
+
+    def _round_trip(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def __contains__(self, key) -> bool:
+        self._round_trip()
+        return key in self.data
+
+    def __getitem__(self, key):
+        self._round_trip()
+        return copy.deepcopy(self.data[key])
+
+    def get(self, key, default=None):
+        self._round_trip()
+        return copy.deepcopy(self.data[key]) if key in self.data else default
+
+    def __setitem__(self, key, value) -> None:
+        self._round_trip()
+        self.data[key] = copy.deepcopy(value)
+
+
+class FakeSocket:
+    """One connection to ``app``, driven through the ASGI websocket interface."""
+
+    def __init__(self, app, rng: random.Random, query: str):
+        self.rng = rng
+        self.inbox: list[dict] = []
+        self.received = 0
+        self._incoming: asyncio.Queue = asyncio.Queue()
+        self._incoming.put_nowait({"type": "websocket.connect"})
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "server": ("fuzz", 80),
+            "client": ("fuzz", 0),
+            "root_path": "",
+            "path": "/ws",
+            "raw_path": b"/ws",
+            "query_string": query.encode(),
+            "headers": [],
+            "subprotocols": [],
+        }
+        self.task = asyncio.create_task(app(scope, self._receive, self._send))
+
+    async def _jitter(self) -> None:
+        for _ in range(self.rng.randrange(MAX_YIELDS)):
+            await asyncio.sleep(0)
+
+    async def _receive(self) -> dict:
+        await self._jitter()
+        return await self._incoming.get()
+
+    async def _send(self, message: dict) -> None:
+        # A socket delivers in the order sends are made; the sender is what
+        # waits (a full write buffer), so the yield comes after delivery.
+        if message["type"] == "websocket.send":
+            text = message.get("text")
+            if text is None:
+                text = zlib.decompress(message["bytes"], -zlib.MAX_WBITS).decode()
+            payload = json.loads(text)
+            batch = payload if isinstance(payload, list) else [payload]
+            self.inbox.extend(batch)
+            self.received += len(batch)
+        await self._jitter()
+
+    def send(self, message: dict) -> None:
+        self._incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(message)})
+
+    def close(self) -> None:
+        self._incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+
+
+class Lobby:
+    """What simulated clients know about each other: games awaiting a joiner."""
+
+    def __init__(self):
+        self.open_games: list[str] = []
+
+
+class Client:
+    """A player with a seeded script; it acts only on what its socket has shown it."""
+
+    def __init__(self, name: int, app, rng: random.Random, lobby: Lobby, observe, trace: list[str]):
+        self.name = name
+        self.app = app
+        self.rng = rng
+        self.lobby = lobby
+        self.observe = observe  # (gid, first ply, moves) -> None
+        self.trace = trace
+        self.sockets: list[FakeSocket] = []
+        self.sock: FakeSocket | None = None
+        self.seats: list[tuple[str, str]] = []  # every seat this client has held
+        self.frames_sent = 0
+        self._forget_game()
+
+    def _forget_game(self) -> None:
+        self.gid: str | None = None
+        self.color: str | None = None
+        self.started = False
+        self.ply = 0
+        self.pending: tuple[str, str | None, str | None] | None = None  # (request, gid, color)
+        self.moved_at: int | None = None
+
+    def _send(self, message: dict) -> None:
+        self.trace.append(f"client {self.name}: {json.dumps(message)}")
+        self.frames_sent += 1
+        self.sock.send(message)
+
+    def absorb(self) -> None:
+        if self.sock is None:
+            return
+        inbox, self.sock.inbox = self.sock.inbox, []
+        for message in inbox:
+            self._handle(message)
+
+    def _handle(self, message: dict) -> None:
+        kind = message["type"]
+        if kind == "game_created":
+            self.gid, self.color = message["gameId"], message["color"]
+            self.seats.append((self.gid, self.color))
+            if self.pending is not None and self.pending[0] == "create_game":
+                self.lobby.open_games.append(self.gid)
+            self.pending = None
+        elif kind == "game_start":
+            if self.gid is None and self.pending is not None and self.pending[0] == "join_game":
+                self.gid, self.color = self.pending[1], message["color"]
+                self.seats.append((self.gid, self.color))
+            self.pending = None
+            self.started = True
+            self.ply = 0
+        elif kind == "game_state":
+            self.gid, self.color = self.pending[1], message["color"]
+            self.pending = None
+            self.started = message["started"]
+            self.ply = len(message["moves"])
+            self.observe(self.gid, 0, message["moves"])
+        elif kind == "move_made":
+            move = {k: message[k] for k in ("by", "from", "to", "promotion") if k in message}
+            self.observe(self.gid, self.ply, [move])
+            self.ply += 1
+        elif kind == "error":
+            if message["code"] not in EXPECTED_ERRORS:
+                raise InvariantError(f"client {self.name} got unexpected error {message}")
+            if self.pending is not None:
+                self.pending = None
+        elif kind not in ("ping", "game_over"):
+            raise InvariantError(f"client {self.name} got unexpected message {message}")
+
+    def connect(self) -> None:
+        query = "&".join(q for q in ("batch=1", "compress=deflate-raw") if self.rng.random() < 0.5)
+        self.sock = FakeSocket(self.app, self.rng, query)
+        self.sockets.append(self.sock)
+        self.trace.append(f"client {self.name}: connect ?{query}")
+
+    def disconnect(self) -> None:
+        self.trace.append(f"client {self.name}: disconnect")
+        self.sock.close()
+        self.sock = None
+        self._forget_game()
+
+    def step(self) -> None:
+        self.absorb()
+        roll = self.rng.random()
+        if self.sock is None:
+            if roll < 0.5:
+                self.connect()
+        elif roll < 0.02:
+            self.disconnect()
+        elif self.gid is None:
+            if self.pending is None:
+                self._seek_game()
+        elif self.started and self.moved_at != self.ply:
+            my_turn = ("white" if self.ply % 2 == 0 else "black") == self.color
+            # Now and then move out of turn, which the server must refuse
+            if my_turn or roll < 0.05:
+                frm, to = SHUFFLES[self.color][(self.ply // 2) % 2]
+                self.moved_at = self.ply
+                self._send({"type": "move", "from": frm, "to": to})
+
+    def _seek_game(self) -> None:
+        roll = self.rng.random()
+        if roll < 0.25:
+            self.pending = ("create_game", None, None)
+            self._send({"type": "create_game"})
+        elif roll < 0.55 and self.lobby.open_games:
+            gid = self.rng.choice(self.lobby.open_games)
+            if self.rng.random() < 0.7:
+                self.lobby.open_games.remove(gid)
+            self.pending = ("join_game", gid, None)
+            self._send({"type": "join_game", "gameId": gid})
+        elif roll < 0.8 and self.seats:
+            gid, color = self.rng.choice(self.seats)
+            self.pending = ("rejoin_game", gid, color)
+            self._send({"type": "rejoin_game", "gameId": gid, "color": color})
+        else:
+            self.pending = ("find_game", None, None)
+            self._send({"type": "find_game"})
+
+
+@contextlib.asynccontextmanager
+async def running(app):
+    """Run ``app``'s lifespan (heartbeat, clock scheduler) around the block."""
+    incoming: asyncio.Queue = asyncio.Queue()
+    events = {"lifespan.startup.complete": asyncio.Event(), "lifespan.shutdown.complete": asyncio.Event()}
+
+    async def send(message: dict) -> None:
+        if message["type"] in events:
+            events[message["type"]].set()
+
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}}, incoming.get, send))
+    incoming.put_nowait({"type": "lifespan.startup"})
+    await events["lifespan.startup.complete"].wait()
+    try:
+        yield
+    finally:
+        incoming.put_nowait({"type": "lifespan.shutdown"})
+        await events["lifespan.shutdown.complete"].wait()
+        await task
+
+
+def _clear_live_state() -> None:
+    for live in (modal_app.connections, modal_app.game_buckets, modal_app.game_boards, modal_app.match_queue, modal_app.outboxes):
+        live.clear()
+
+
+async def fuzz(seed: int = 0, clients: int = 50, rounds: int = 200, store_latency: float = 0.0) -> FuzzReport:
+    """One seeded run; raises InvariantError (with a trace tail) on a violation."""
+    # Game ids and the creator's color come from the module-level random
+    random.seed(seed)
+    _clear_live_state()
+    store = LatentStore(store_latency)
+    app = create_web_app(
+        store,
+        heartbeat_interval=3600,
+        connection_rate_limit=None,
+        game_rate_limit=None,
+        snapshot_interval=16,
+        # No timer tasks: nothing wall-clock-driven joins the schedule
+        instrumentation=Instrumentation(lag_interval=None, slow_handler_ms=None),
+    )
+    rng = random.Random(seed)
+    lobby = Lobby()
+    seen: dict[str, list[tuple[int, list[dict]]]] = {}
+    trace: list[str] = []
+
+    def observe(gid: str, ply: int, moves: list[dict]) -> None:
+        seen.setdefault(gid, []).append((ply, moves))
+
+    try:
+        async with running(app):
+            players = [Client(i, app, random.Random(f"{seed}:{i}"), lobby, observe, trace) for i in range(clients)]
+            started = time.perf_counter()
+            for round_ in range(rounds):
+                trace.append(f"round {round_}")
+                for player in rng.sample(players, len(players)):
+                    player.step()
+                for _ in range(rng.randrange(1, MAX_YIELDS * 2)):
+                    await asyncio.sleep(0)
+            for player in players:
+                if player.sock is not None:
+                    player.disconnect()
+            sockets = [sock for player in players for sock in player.sockets]
+            results = await asyncio.gather(*(sock.task for sock in sockets), return_exceptions=True)
+            seconds = time.perf_counter() - started
+            # Let any outbox flush that was still queued finish
+            for _ in range(MAX_YIELDS * 2):
+                await asyncio.sleep(0)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise InvariantError(f"a handler raised {result!r}") from result
+        _check(store.data, seen)
+    except InvariantError as exc:
+        tail = "\n".join(trace[-20:])
+        raise InvariantError(f"seed {seed}: {exc}\nlast actions:\n{tail}") from exc
+    finally:
+        _clear_live_state()
+
+    games = store.data
+    return FuzzReport(
+        seed=seed,
+        games=len(games),
+        moves=sum(len(record["moves"]) for record in games.values()),
+        frames_in=sum(player.frames_sent for player in players),
+        messages_out=sum(sock.received for sock in sockets),
+        seconds=seconds,
+        digest=hashlib.sha256(json.dumps(games, sort_keys=True).encode()).hexdigest()[:16],
+    )
+
+
+def _check(games: dict, seen: dict[str, list[tuple[int, list[dict]]]]) -> None:
+    leaks = {
+        name: len(live)
+        for name, live in (
+            ("connections", modal_app.connections),
+            ("game_buckets", modal_app.game_buckets),
+            ("game_boards", modal_app.game_boards),
+            ("match_queue", modal_app.match_queue),
+            ("outboxes", modal_app.outboxes),
+        )
+        if live
+    }
+    if leaks:
+        raise InvariantError(f"live state leaked after every socket closed: {leaks}")
+    for gid, record in games.items():
+        if len(set(record["seats"])) != len(record["seats"]):
+            raise InvariantError(f"game {gid} has a seat claimed twice: {record['seats']}")
+        for ply, move in enumerate(record["moves"]):
+            if move["by"] != ("white" if ply % 2 == 0 else "black"):
+                raise InvariantError(f"game {gid} breaks turn parity at ply {ply}: {move}")
+    for gid, sightings in seen.items():
+        moves = games[gid]["moves"]
+        for ply, sighting in sightings:
+            if moves[ply : ply + len(sighting)] != sighting:
+                raise InvariantError(f"game {gid}: a client saw {sighting} at ply {ply}, the store has {moves[ply : ply + len(sighting)]}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--runs", type=int, default=1, help="consecutive seeds to run")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--store-latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    for seed in range(args.seed, args.seed + args.runs):
+        report = asyncio.run(fuzz(seed, args.clients, args.rounds, args.store_latency_ms / 1000))
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Server-authoritative game clocks and the one scheduler that flags them.
+
+A game created with a time control carries a clock in its record:
+
+    {"initialMs": 300000, "incrementMs": 2000,
+     "whiteMs": 281950, "blackMs": 296400,   # banked as of runningSince
+     "runningSince": 1760000000.25,          # wall clock; None until the game starts
+     "flagged": None}                        # the color that ran out, once one has
+
+Only the side to move is running, so one timestamp is enough: its remaining
+time is its banked time minus the time since ``runningSince``. Wall-clock
+seconds (not the event loop's monotonic clock) are stored so a record stays
+meaningful across container restarts.
+
+Flag falls are detected by a single ClockScheduler for the whole process —
+a heap of deadlines, one live entry per running game — rather than a timer
+task per game. Rescheduling a game (every move) pushes a new entry and
+leaves the old one in place; stale entries are recognized and dropped when
+they reach the top of the heap.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def new_clock(initial_ms: int, increment_ms: int) -> dict:
+    return {
+        "initialMs": initial_ms,
+        "incrementMs": increment_ms,
+        "whiteMs": initial_ms,
+        "blackMs": initial_ms,
+        "runningSince": None,
+        "flagged": None,
+    }
+
+
+def start(clock: dict, now: float) -> None:
+    """Start the side to move's clock (White's, when the game begins)."""
+    clock["runningSince"] = now
+
+
+def remaining(clock: dict, side: str, now: float) -> int:
+    """Milliseconds ``side`` has left at ``now``; never negative."""
+    banked = clock[f"{side}Ms"]
+    if clock["runningSince"] is None:
+        return banked
+    return max(0, banked - int((now - clock["runningSince"]) * 1000))
+
+
+def deadline(clock: dict, side: str) -> float:
+    """Wall-clock time at which the running ``side`` flags."""
+    return clock["runningSince"] + clock[f"{side}Ms"] / 1000
+
+
+def press(clock: dict, side: str, now: float) -> None:
+    """``side`` has moved: bank its time plus the increment and start the opponent."""
+    clock[f"{side}Ms"] = remaining(clock, side, now) + clock["incrementMs"]
+    clock["runningSince"] = now
+
+
+def stop(clock: dict) -> None:
+    """The game ended on the board: freeze both clocks where they are."""
+    clock["runningSince"] = None
+
+
+def flag(clock: dict, side: str) -> None:
+    clock[f"{side}Ms"] = 0
+    clock["runningSince"] = None
+    clock["flagged"] = side
+
+
+def wire(clock: dict, side_to_move: str, now: float) -> dict:
+    """The clock as sent to clients: both sides' remaining time at ``now``."""
+    return {
+        "whiteMs": remaining(clock, "white", now) if side_to_move == "white" else clock["whiteMs"],
+        "blackMs": remaining(clock, "black", now) if side_to_move == "black" else clock["blackMs"],
+    }
+
+
+class ClockScheduler:
+    """Call ``on_deadline(game_id)`` when a game's scheduled deadline passes."""
+
+    def __init__(self, on_deadline: Callable[[str], Awaitable[None]], now: Callable[[], float] = time.time):
+        self._on_deadline = on_deadline
+        self._now = now
+        self._heap: list[tuple[float, int, str]] = []
+        self._deadlines: dict[str, float] = {}
+        self._seq = 0  # breaks deadline ties first-scheduled first
+        self._wake = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._deadlines
+
+    def schedule(self, game_id: str, when: float) -> None:
+        """Set (or move) ``game_id``'s deadline."""
+        self._deadlines[game_id] = when
+        self._seq += 1
+        heapq.heappush(self._heap, (when, self._seq, game_id))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+        if self._heap[0][2] == game_id:
+            self._wake.set()
+
+    def cancel(self, game_id: str) -> None:
+        self._deadlines.pop(game_id, None)
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if self._deadlines.get(entry[2]) == entry[0]]
+        heapq.heapify(self._heap)
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def due(self) -> list[str]:
+        """Pop every game whose deadline has passed."""
+        now = self._now()
+        games = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, game_id = heapq.heappop(self._heap)
+            del self._deadlines[game_id]
+            games.append(game_id)
+            self._drop_stale()
+        return games
+
+    async def run(self) -> None:
+        while True:
+            for game_id in self.due():
+                try:
+                    await self._on_deadline(game_id)
+                except Exception:
+                    logger.exception("clock deadline handler failed for game %s", game_id)
+            self._wake.clear()
+            timeout = self._heap[0][0] - self._now() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except TimeoutError:
+                pass
@@ -0,0 +1,137 @@
+"""Static evaluation of 5×5×5 positions, in centipawns from White's side.
+
+Deliberately simple — material, piece-square tables and a mobility
+approximation — so analysis responses are cheap and deterministic. Boards
+use rules.py's representation.
+
+Mobility counts, for every non-pawn piece, the first step in each of its
+directions that is empty or holds an enemy piece: a slider's open rays and
+a leaper's available squares, without walking rays to their ends.
+
+``evaluate`` scores one board; ``evaluate_batch`` scores many at once with
+NumPy (when installed) by encoding them as an (N, 125) array of piece codes
+and doing each term as one vectorized gather-and-sum. Both compute exactly
+the same function.
+"""
+
+from typing import Sequence
+
+from rules import EMPTY, LEAPER_STEPS, NUM_SQUARES, SIZE, SLIDER_RAYS, coords
+
+try:
+    import numpy as np
+except ImportError:  # optional: evaluate_batch falls back to evaluate
+    np = None
+
+PIECE_VALUES = {"P": 100, "N": 300, "U": 300, "B": 400, "R": 500, "Q": 1100, "K": 0}
+MOBILITY = 4  # per open direction
+MATE = 100_000
+
+
+def _centrality(sq: int) -> int:
+    # 0 on the corners up to 6 in the middle of the cube
+    return sum(2 - abs(c - SIZE // 2) for c in coords(sq))
+
+
+def _pawn_progress(sq: int, color: str) -> int:
+    # Pawns promote on the far rank of the far level, so both axes count
+    _, y, z = coords(sq)
+    return y + z if color == "white" else (SIZE - 1 - y) + (SIZE - 1 - z)
+
+
+# Piece-square bonuses per piece letter (both colors), indexed by square.
+PIECE_SQUARE = {}
+for _kind in PIECE_VALUES:
+    for _piece, _color in ((_kind, "white"), (_kind.lower(), "black")):
+        if _kind == "P":
+            PIECE_SQUARE[_piece] = [6 * _pawn_progress(sq, _color) for sq in range(NUM_SQUARES)]
+        elif _kind == "K":
+            # Kings are safest tucked away, not in the open middle
+            PIECE_SQUARE[_piece] = [-3 * _centrality(sq) for sq in range(NUM_SQUARES)]
+        else:
+            PIECE_SQUARE[_piece] = [5 * _centrality(sq) for sq in range(NUM_SQUARES)]
+
+
+# Per piece kind and square: the first square in each direction it moves.
+FIRST_STEPS = {kind: [[ray[0] for ray in rays] for rays in table] for kind, table in SLIDER_RAYS.items()}
+FIRST_STEPS.update(LEAPER_STEPS)
+FIRST_STEPS["P"] = [[] for _ in range(NUM_SQUARES)]
+
+
+def evaluate(board: list[str]) -> int:
+    score = 0
+    for sq, piece in enumerate(board):
+        if piece == EMPTY:
+            continue
+        white = piece.isupper()
+        value = PIECE_VALUES[piece.upper()] + PIECE_SQUARE[piece][sq]
+        for to in FIRST_STEPS[piece.upper()][sq]:
+            target = board[to]
+            if target == EMPTY or target.isupper() != white:
+                value += MOBILITY
+        score += value if white else -value
+    return score
+
+
+# Batch encoding: 0 is an empty square, 1-7 White's pieces, 8-14 Black's.
+PIECE_CODES = {EMPTY: 0}
+for _i, _kind in enumerate("KQRBNUP"):
+    PIECE_CODES[_kind] = _i + 1
+    PIECE_CODES[_kind.lower()] = _i + 8
+_MOVERS = "KQRBNU"  # the kinds with a mobility term
+
+if np is not None:
+    _CODES = np.zeros(128, dtype=np.int8)
+    for _piece, _code in PIECE_CODES.items():
+        _CODES[ord(_piece)] = _code
+    # Signed material plus piece-square bonus, per code and square
+    _STATIC = np.zeros((len(PIECE_CODES), NUM_SQUARES), dtype=np.int64)
+    for _piece, _code in PIECE_CODES.items():
+        if _piece != EMPTY:
+            _sign = 1 if _piece.isupper() else -1
+            _STATIC[_code] = _sign * (PIECE_VALUES[_piece.upper()] + np.array(PIECE_SQUARE[_piece]))
+    # _REACH[t, k * 125 + sq] is 1 when a kind-k piece on sq has t as a first
+    # step, so (open squares) @ _REACH counts every square's open directions
+    # for all six kinds in one matrix product.
+    _REACH = np.zeros((NUM_SQUARES, len(_MOVERS) * NUM_SQUARES), dtype=np.float32)
+    for _k, _kind in enumerate(_MOVERS):
+        for _sq, _steps in enumerate(FIRST_STEPS[_kind]):
+            _REACH[_steps, _k * NUM_SQUARES + _sq] = 1
+    _WHITE_MOVERS = np.array([PIECE_CODES[k] for k in _MOVERS], dtype=np.int8)[:, None]
+    _BLACK_MOVERS = np.array([PIECE_CODES[k.lower()] for k in _MOVERS], dtype=np.int8)[:, None]
+    _SQUARES = np.arange(NUM_SQUARES)
+
+
+def encode_boards(boards: Sequence[list[str]]) -> "np.ndarray":
+    """Piece codes of ``boards`` as an (N, 125) int8 array."""
+    text = "".join("".join(board) for board in boards).encode("ascii")
+    return _CODES[np.frombuffer(text, dtype=np.uint8)].reshape(len(boards), NUM_SQUARES)
+
+
+def evaluate_encoded(codes: "np.ndarray") -> "np.ndarray":
+    """evaluate() for every row of an (N, 125) piece-code array."""
+    n = len(codes)
+    static = _STATIC[codes, _SQUARES].sum(axis=1)
+    empty = codes == 0
+    white = (codes > 0) & (codes < 8)
+    black = codes >= 8
+    # (N, 6, 125): open directions a kind-k piece on each square would have
+    reach_white = ((empty | black).astype(np.float32) @ _REACH).reshape(n, len(_MOVERS), NUM_SQUARES)
+    reach_black = ((empty | white).astype(np.float32) @ _REACH).reshape(n, len(_MOVERS), NUM_SQUARES)
+    # ... counted only where such a piece actually stands
+    mobility = (reach_white * (codes[:, None, :] == _WHITE_MOVERS)).sum(axis=(1, 2)) - (
+        reach_black * (codes[:, None, :] == _BLACK_MOVERS)
+    ).sum(axis=(1, 2))
+    return static + MOBILITY * np.rint(mobility).astype(np.int64)
+
+
+def evaluate_batch(boards: Sequence[list[str]], chunk_size: int = 4096) -> list[int]:
+    """evaluate() for many boards; vectorized when NumPy is available."""
+    # Below a handful of boards the array setup costs more than it saves
+    if np is None or len(boards) < 8:
+        return [evaluate(board) for board in boards]
+    scores = []
+    # Chunked so the (N, 6, 125) intermediates stay a few tens of MB
+    for i in range(0, len(boards), chunk_size):
+        scores.extend(evaluate_encoded(encode_boards(boards[i : i + chunk_size])).tolist())
+    return scores
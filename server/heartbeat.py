@@ -0,0 +1,164 @@
+"""Server-driven liveness checks for every open WebSocket.
+
+A refresh's old socket, or a phone that dropped off the network, can stay
+half-open for minutes: nothing fails until the next send, and an idle game
+never sends. The heartbeat pings sockets that have gone quiet and closes any
+that don't answer, so dead entries leave the live-connection map within a
+bounded time instead of whenever a broadcast happens to hit them.
+
+All deadlines live in one hashed timer wheel driven by a single task, so the
+per-socket cost is a dict entry rather than a sleeping coroutine, and a tick
+only touches the sockets whose deadline falls in that slot. Pings and
+closes run as their own tasks, each bounded by the timeout, so a dead peer
+that never drains a send or answers a close handshake can't stall the wheel.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Hashable
+
+
+class TimerWheel:
+    """Hashed timing wheel with O(1) schedule/cancel.
+
+    Deadlines are absolute tick numbers hashed into ``slots`` buckets; a
+    bucket holds every key due on a tick congruent to its index, so advancing
+    one tick visits one bucket and fires only the entries that are actually
+    due (the rest are due on a later lap). Rescheduling a key replaces its
+    previous deadline.
+    """
+
+    def __init__(self, slots: int = 512):
+        self._buckets: list[dict[Hashable, tuple[int, Any]]] = [{} for _ in range(slots)]
+        self._slot_of: dict[Hashable, int] = {}
+        self.now = 0  # ticks advanced so far
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
+
+    def schedule(self, key: Hashable, ticks: int, item: Any) -> None:
+        """Fire ``item`` after ``ticks`` more ticks (at least one)."""
+        self.cancel(key)
+        due = self.now + max(1, ticks)
+        slot = due % len(self._buckets)
+        self._buckets[slot][key] = (due, item)
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable) -> None:
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            del self._buckets[slot][key]
+
+    def advance(self) -> list[Any]:
+        """Move forward one tick and return the items that came due."""
+        self.now += 1
+        bucket = self._buckets[self.now % len(self._buckets)]
+        due = [key for key, (at, _) in bucket.items() if at <= self.now]
+        fired = []
+        for key in due:
+            fired.append(bucket.pop(key)[1])
+            del self._slot_of[key]
+        return fired
+
+
+class _Peer:
+    __slots__ = ("ws", "on_dead", "last_seen", "pinged")
+
+    def __init__(self, ws, on_dead: Callable[[], None], now: float):
+        self.ws = ws
+        self.on_dead = on_dead
+        self.last_seen = now
+        self.pinged = False
+
+
+class Heartbeat:
+    """Ping quiet sockets and close the ones that stop answering.
+
+    A socket is pinged once it has been silent for ``interval`` seconds and
+    closed if it is still silent ``timeout`` seconds after the ping, so a dead
+    peer is detected within ``interval + timeout + tick``. Any inbound frame
+    counts as proof of life: ``touch`` only stamps a timestamp, and the wheel
+    entry is pushed back lazily when it fires, so busy sockets cost nothing
+    extra per message.
+    """
+
+    def __init__(self, interval: float, timeout: float, ping: dict, tick: float = 1.0, slots: int = 512):
+        self.interval = interval
+        self.timeout = timeout
+        self.tick = min(tick, interval, timeout)
+        self._ping = ping
+        self._wheel = TimerWheel(slots)
+        self._peers: dict[int, _Peer] = {}
+        self._sends: set[asyncio.Task] = set()  # pings and closes in flight
+
+    def __len__(self) -> int:
+        return len(self._peers)
+
+    def _ticks(self, seconds: float) -> int:
+        return max(1, round(seconds / self.tick))
+
+    def watch(self, ws, on_dead: Callable[[], None]) -> None:
+        """Start tracking a socket; ``on_dead`` runs before a dead one is closed."""
+        peer = _Peer(ws, on_dead, time.monotonic())
+        self._peers[id(ws)] = peer
+        self._wheel.schedule(id(ws), self._ticks(self.interval), peer)
+
+    def touch(self, ws) -> None:
+        peer = self._peers.get(id(ws))
+        if peer is not None:
+            peer.last_seen = time.monotonic()
+            peer.pinged = False
+
+    def forget(self, ws) -> None:
+        if self._peers.pop(id(ws), None) is not None:
+            self._wheel.cancel(id(ws))
+
+    async def _ping_peer(self, peer: _Peer) -> None:
+        try:
+            await asyncio.wait_for(peer.ws.send_json(self._ping), self.timeout)
+        except Exception:
+            pass  # a failed send is a dead peer; the timeout below closes it
+
+    async def _close_peer(self, peer: _Peer) -> None:
+        try:
+            await asyncio.wait_for(peer.ws.close(), self.timeout)
+        except Exception:
+            pass
+
+    def _expire(self, peer: _Peer, now: float) -> list:
+        """Decide what a due peer needs; returns the coroutines to run."""
+        key = id(peer.ws)
+        quiet = now - peer.last_seen
+        if quiet < self.interval:
+            # Heard from since this deadline was set: push it back.
+            self._wheel.schedule(key, self._ticks(self.interval - quiet), peer)
+            return []
+        if not peer.pinged:
+            peer.pinged = True
+            self._wheel.schedule(key, self._ticks(self.timeout), peer)
+            return [self._ping_peer(peer)]
+        # Pinged and still silent: detach first (synchronously) so no
+        # broadcast targets it while the close handshake is pending.
+        del self._peers[key]
+        peer.on_dead()
+        return [self._close_peer(peer)]
+
+    async def run(self) -> None:
+        """Drive the wheel forever; one task serves every socket."""
+        started = time.monotonic()
+        while True:
+            await asyncio.sleep(self.tick)
+            now = time.monotonic()
+            # Catch up on ticks missed while the loop was busy, so deadlines
+            # don't drift when a tick runs late.
+            target = int((now - started) / self.tick)
+            while self._wheel.now < target:
+                for peer in self._wheel.advance():
+                    for send in self._expire(peer, now):
+                        # Never awaited here: the next tick must not wait on a peer
+                        task = asyncio.create_task(send)
+                        self._sends.add(task)
+                        task.add_done_callback(self._sends.discard)
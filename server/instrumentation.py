@@ -0,0 +1,232 @@
+"""Event-loop health instrumentation, switchable at runtime.
+
+Every game shares one event loop, so a handler that blocks (a slow store
+call, a huge model dump) stalls every player. Three tools find those:
+
+- A lag monitor: a task that sleeps a fixed interval and records how late it
+  wakes up. Lateness is time some callback held the loop.
+- A slow-handler log: the time each websocket frame's handling held the
+  loop (its awaits excluded), tagged with the message type and game id,
+  kept when it crosses a threshold.
+- A sampling profiler (opt-in): a thread that periodically snapshots the
+  loop thread's Python stack and counts "folded" stacks — one
+  ``frame;frame;frame count`` line each, the input format of flamegraph.pl
+  and speedscope.
+
+All three are configured through ``configure()`` and can be flipped while
+the server runs (see the /debug routes in modal_app.py).
+"""
+
+import asyncio
+import contextlib
+import logging
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# configure() default meaning "leave this setting as it is" (None means off)
+KEEP = object()
+
+
+class _HandlerTiming:
+    """Loop time one frame's handling has used: its synchronous sections only.
+
+    Time spent suspended (``off_the_clock``) is other handlers' time, so it
+    is left out.
+    """
+
+    __slots__ = ("kind", "elapsed", "resumed", "paused")
+
+    def __init__(self):
+        self.kind = "unparsed"
+        self.elapsed = 0.0
+        self.resumed = time.perf_counter()
+        self.paused = 0  # nesting depth; concurrent sends each pause
+
+    def label(self, kind: str) -> None:
+        self.kind = kind
+
+    def pause(self) -> None:
+        if self.paused == 0:
+            self.elapsed += time.perf_counter() - self.resumed
+        self.paused += 1
+
+    def resume(self) -> None:
+        self.paused -= 1
+        if self.paused == 0:
+            self.resumed = time.perf_counter()
+
+    def stop(self) -> float:
+        if self.paused == 0:
+            self.elapsed += time.perf_counter() - self.resumed
+            self.paused = 1
+        return self.elapsed
+
+
+# The frame being handled by the current task, if it is being timed
+_current_handler: ContextVar[_HandlerTiming | None] = ContextVar("current_handler", default=None)
+
+
+@contextlib.contextmanager
+def off_the_clock():
+    """Wrap an await inside a frame's handling so its suspension isn't timed."""
+    timing = _current_handler.get()
+    if timing is None:
+        yield
+        return
+    timing.pause()
+    try:
+        yield
+    finally:
+        timing.resume()
+
+
+class SamplingProfiler:
+    """Count folded stacks of one thread, sampled from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Instrumentation:
+    """Loop-lag, slow-handler and profiler state for one app."""
+
+    def __init__(
+        self,
+        lag_interval: float | None = 0.25,
+        slow_handler_ms: float | None = 50.0,
+        history: int = 256,
+    ):
+        self.lag_interval = lag_interval
+        self.slow_handler_ms = slow_handler_ms
+        self.lag_ms: deque[float] = deque(maxlen=history)
+        self.slow_handlers: deque[dict] = deque(maxlen=history)
+        self.profiler: SamplingProfiler | None = None
+        self._lag_task: asyncio.Task | None = None
+        self._loop_thread: int | None = None
+
+    def start(self) -> None:
+        """Start background pieces; call from the event loop thread."""
+        self._loop_thread = threading.get_ident()
+        self._apply_lag_interval()
+
+    def stop(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        self.stop_profiler()
+
+    def _apply_lag_interval(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self.lag_interval is not None and self._loop_thread is not None:
+            self._lag_task = asyncio.create_task(self._measure_lag(self.lag_interval))
+
+    async def _measure_lag(self, interval: float) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            self.lag_ms.append(max(0.0, loop.time() - expected) * 1000)
+
+    def configure(self, *, lag_interval=KEEP, slow_handler_ms=KEEP, profiler_interval=KEEP) -> None:
+        """Change settings live. ``None`` switches a tool off; KEEP leaves it."""
+        if lag_interval is not KEEP:
+            self.lag_interval = lag_interval
+            self.lag_ms.clear()
+            self._apply_lag_interval()
+        if slow_handler_ms is not KEEP:
+            self.slow_handler_ms = slow_handler_ms
+        if profiler_interval is not KEEP:
+            self.stop_profiler()
+            if profiler_interval is not None:
+                self.start_profiler(profiler_interval)
+
+    def start_profiler(self, interval: float) -> None:
+        if self._loop_thread is None:
+            raise RuntimeError("instrumentation has not been started on the event loop")
+        self.stop_profiler()
+        self.profiler = SamplingProfiler(self._loop_thread, interval)
+        self.profiler.start()
+
+    def stop_profiler(self) -> None:
+        # The last profile stays readable until the next one starts.
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
+
+    def start_handler(self) -> _HandlerTiming:
+        """Start timing one frame's handling in the current task.
+
+        Awaits inside it belong in ``off_the_clock()``; ``finish_handler``
+        records it.
+        """
+        timing = _HandlerTiming()
+        _current_handler.set(timing)
+        return timing
+
+    def finish_handler(self, timing: _HandlerTiming, game_id: str | None) -> None:
+        """Stop ``timing``; ``game_id`` is the game as of the end of the frame."""
+        _current_handler.set(None)
+        ms = timing.stop() * 1000
+        if self.slow_handler_ms is None or ms < self.slow_handler_ms:
+            return
+        entry = {"type": timing.kind, "gameId": game_id, "ms": round(ms, 3), "at": time.time()}
+        self.slow_handlers.append(entry)
+        logger.warning("slow %s handler for game %s: %.1f ms", timing.kind, game_id, ms)
+
+    def snapshot(self) -> dict:
+        lag = list(self.lag_ms)
+        profiler = self.profiler
+        return {
+            "lagIntervalMs": None if self.lag_interval is None else self.lag_interval * 1000,
+            "lag": {
+                "samples": len(lag),
+                "meanMs": round(statistics.fmean(lag), 3) if lag else None,
+                "maxMs": round(max(lag), 3) if lag else None,
+            },
+            "slowHandlerMs": self.slow_handler_ms,
+            "slowHandlers": list(self.slow_handlers),
+            "profiler": {
+                "running": profiler is not None and profiler.running,
+                "intervalMs": None if profiler is None else profiler.interval * 1000,
+                "samples": 0 if profiler is None else profiler.samples,
+            },
+        }
@@ -6,7 +6,7 @@ from __future__ import annotations
 from enum import Enum
 from typing import List, Literal, Optional, Union
 
-from pydantic import BaseModel, ConfigDict, Field, RootModel, constr
+from pydantic import BaseModel, ConfigDict, Field, RootModel, conint, constr
 
 
 class Color(Enum):
@@ -31,6 +31,28 @@ class ErrorCode(Enum):
     invalid_move = 'invalid_move'
     game_not_started = 'game_not_started'
     wrong_turn = 'wrong_turn'
+    rate_limited = 'rate_limited'
+    game_over = 'game_over'
+
+
+class TimeControl(BaseModel):
+    model_config = ConfigDict(
+        extra='forbid',
+    )
+    initialMs: conint(ge=1000, le=86400000)
+    incrementMs: conint(ge=0, le=3600000)
+
+
+class Clock(BaseModel):
+    model_config = ConfigDict(
+        extra='forbid',
+    )
+    whiteMs: conint(ge=0)
+    blackMs: conint(ge=0)
+
+
+class GameOverReason(Enum):
+    timeout = 'timeout'
 
 
 class CreateGame(BaseModel):
@@ -38,6 +60,7 @@ class CreateGame(BaseModel):
         extra='forbid',
     )
     type: Literal['create_game']
+    timeControl: Optional[TimeControl] = None
 
 
 class GameCreated(BaseModel):
@@ -73,6 +96,7 @@ class GameStart(BaseModel):
     type: Literal['game_start']
     color: Color
     initialPosition: Optional[str] = None
+    clock: Optional[Clock] = None
 
 
 class MoveRecord(BaseModel):
@@ -104,6 +128,7 @@ class MoveMade(BaseModel):
     from_: constr(pattern=r'^[A-E][a-e][1-5]$') = Field(..., alias='from')
     to: constr(pattern=r'^[A-E][a-e][1-5]$')
     promotion: Optional[Promotion] = None
+    clock: Optional[Clock] = None
 
 
 class Error(BaseModel):
@@ -115,6 +140,37 @@ class Error(BaseModel):
     message: str
 
 
+class Ping(BaseModel):
+    model_config = ConfigDict(
+        extra='forbid',
+    )
+    type: Literal['ping']
+
+
+class Pong(BaseModel):
+    model_config = ConfigDict(
+        extra='forbid',
+    )
+    type: Literal['pong']
+
+
+class FindGame(BaseModel):
+    model_config = ConfigDict(
+        extra='forbid',
+    )
+    type: Literal['find_game']
+
+
+class GameOver(BaseModel):
+    model_config = ConfigDict(
+        extra='forbid',
+    )
+    type: Literal['game_over']
+    reason: GameOverReason
+    winner: Color
+    clock: Optional[Clock] = None
+
+
 class GameState(BaseModel):
     model_config = ConfigDict(
         extra='forbid',
@@ -123,6 +179,8 @@ class GameState(BaseModel):
     color: Color
     started: bool
     moves: List[MoveRecord]
+    timeControl: Optional[TimeControl] = None
+    clock: Optional[Clock] = None
 
 
 class WebsocketV1MessageEnvelope(
@@ -137,6 +195,10 @@ class WebsocketV1MessageEnvelope(
             Move,
             MoveMade,
             Error,
+            Ping,
+            Pong,
+            FindGame,
+            GameOver,
         ]
     ]
 ):
@@ -150,4 +212,8 @@ class WebsocketV1MessageEnvelope(
         Move,
         MoveMade,
         Error,
+        Ping,
+        Pong,
+        FindGame,
+        GameOver,
     ] = Field(..., title='WebSocket V1 Message Envelope')
@@ -1,37 +1,98 @@
+import asyncio
+import contextlib
+import hmac
+import json
+import os
 import modal
 import random
 import string
+import time
 import fastapi
-from fastapi import WebSocket, WebSocketDisconnect
-from pydantic import ValidationError
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Callable
+from fastapi import Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError
 from messages import (
     WebsocketV1MessageEnvelope,
     CreateGame,
+    FindGame,
     GameCreated,
     JoinGame,
     RejoinGame,
     GameStart,
     GameState,
     Error,
+    Clock,
     Color,
+    GameOver,
     Move,
     MoveMade,
+    MoveRecord,
+    Ping,
+    Pong,
 )
+import clocks
+from clocks import ClockScheduler
+from heartbeat import Heartbeat
+from instrumentation import KEEP, Instrumentation, off_the_clock
+from outbox import Outbox
+from ratelimit import TokenBucket
 
-# Mount the local messages.py module into the container so `from messages import …` works
+# Mount the local server modules into the container so `from messages import …` works.
+# Only plain fastapi: Modal serves the ASGI app itself, so the uvicorn/httpx/
+# jinja/CLI extras in fastapi[standard] would only slow image pulls on cold start.
 image = (
     modal.Image.debian_slim(python_version="3.13")
-    .pip_install("fastapi[standard]>=0.115.4")
-    .add_local_python_source("messages")  # see https://modal.com/docs/guide/images#Adding-local-Python-modules [1]
+    .pip_install("fastapi>=0.115.4", "numpy>=2")
+    .add_local_python_source("messages", "heartbeat", "instrumentation", "ratelimit", "analysis", "evaluation", "rules", "snapshots", "position_index", "clocks", "outbox")  # see https://modal.com/docs/guide/images#Adding-local-Python-modules [1]
 )
 
 app = modal.App("3d-chess-backend")
 
+# The modal.Dict holding durable game records (see create_web_app).
+STORE_NAME = "3d-chess-games"
+# The Modal secret whose DEBUG_TOKEN unlocks the /debug routes.
+DEBUG_SECRET_NAME = "3d-chess-debug"
+
+
+def _debug_secrets() -> list[modal.Secret]:
+    """The debug secret if it has been created, else nothing.
+
+    The /debug routes are opt-in, so a deploy must not fail for want of the
+    secret. Only a deploy (local, with Modal credentials) looks it up; tests
+    and the running container skip the lookup.
+    """
+    if not modal.is_local() or not modal.config.config.get("token_id"):
+        return []
+    secret = modal.Secret.from_name(DEBUG_SECRET_NAME, required_keys=["DEBUG_TOKEN"])
+    try:
+        secret.hydrate()
+    except modal.exception.NotFoundError:
+        return []
+    return [secret]
+
+
 # Live sockets only: gid -> {color: websocket}. The durable game record (seats
 # claimed, move history) lives in the store passed to create_web_app, so a
 # disconnect only detaches the socket here — the game itself survives and a
 # player can rejoin later.
 connections: dict[str, dict[str, WebSocket]] = {}
+# Inbound-frame budget shared by everyone connected to a game, created with
+# the game's first live socket and dropped with its last, like `connections`.
+game_buckets: dict[str, TokenBucket] = {}
+# gid -> (ply, board) for games feeding a position index, so indexing a move
+# applies one move instead of rebuilding the position. Dropped with the
+# game's last live socket.
+game_boards: dict[str, tuple[int, list[str]]] = {}
+# Sockets waiting for an opponent (find_game), oldest first, each mapped to
+# the callback that seats it once paired. An OrderedDict makes joining,
+# pairing and leaving the queue (on disconnect) all O(1).
+match_queue: OrderedDict[WebSocket, Callable[[str, str], None]] = OrderedDict()
+# Sockets that opted into batched and/or compressed frames (see outbox.py),
+# each with the Outbox every send to it goes through.
+outboxes: dict[WebSocket, Outbox] = {}
 
 
 def _new_game_id(store) -> str:
@@ -51,14 +112,39 @@ async def _safe_send(ws: WebSocket, payload: dict) -> bool:
 
     A peer's dead socket must not take down the other player's connection;
     the False return feeds the caller's cleanup, it is not silently ignored.
+    A socket with an outbox gets the payload queued for its next frame.
     """
+    outbox = outboxes.get(ws)
+    if outbox is not None:
+        outbox.put(payload)
+        return True
     try:
-        await ws.send_json(payload)
+        with off_the_clock():
+            await ws.send_json(payload)
         return True
     except Exception:
         return False
 
 
+async def _send_all(messages: list[tuple[WebSocket, dict]]) -> None:
+    """Send each (socket, payload), starting every send before awaiting any.
+
+    Awaiting sends one at a time lets other handlers run mid-broadcast: the
+    first recipient's reply can be handled, and its own broadcast sent, before
+    this one reaches the last recipient, which then sees the two out of order.
+    """
+    sends = []
+    for ws, payload in messages:
+        outbox = outboxes.get(ws)
+        if outbox is not None:
+            # Queued now, not in a task, so it joins this tick's frame
+            outbox.put(payload)
+        else:
+            sends.append(_safe_send(ws, payload))
+    with off_the_clock():
+        await asyncio.gather(*sends)
+
+
 def _remove_player(gid: str, color: str, ws: WebSocket) -> None:
     """Detach a socket from the live-connection map.
 
@@ -68,37 +154,358 @@ def _remove_player(gid: str, color: str, ws: WebSocket) -> None:
     disconnects so players can rejoin.
     """
     conns = connections.get(gid)
-    if conns is None:
-        return
-    if conns.get(color) is ws:
-        del conns[color]
-    if not conns:
+    if conns is not None:
+        if conns.get(color) is ws:
+            del conns[color]
+        if conns:
+            return
         del connections[gid]
+    # No live sockets left (a detached socket may still have touched the
+    # game's bucket since), so its rate-limit state goes too.
+    game_buckets.pop(gid, None)
+    game_boards.pop(gid, None)
+
+
+# Validating and replaying a posted move list both run on the event loop,
+# before the work reaches the analysis pool, so its length is capped. Real
+# games end far sooner.
+MAX_ANALYSIS_MOVES = 2000
+
 
+class AnalysisRequest(BaseModel):
+    moves: list[MoveRecord] = Field(max_length=MAX_ANALYSIS_MOVES)
 
-def create_web_app(store=None) -> fastapi.FastAPI:
+
+class InstrumentationSettings(BaseModel):
+    # Omitted fields are left alone; null switches that tool off. A zero
+    # interval would spin the lag timer on the event loop (or the profiler
+    # thread), so intervals are at least 1 ms.
+    lagIntervalMs: float | None = Field(default=None, ge=1)
+    slowHandlerMs: float | None = Field(default=None, gt=0)
+    profilerIntervalMs: float | None = Field(default=None, ge=1)
+
+
+def create_web_app(
+    store=None,
+    *,
+    heartbeat_interval: float = 20.0,
+    heartbeat_timeout: float = 10.0,
+    analysis_executor: Executor | None = None,
+    connection_rate_limit: tuple[float, float] | None = (5.0, 20.0),
+    game_rate_limit: tuple[float, float] | None = (10.0, 40.0),
+    instrumentation: Instrumentation | None = None,
+    debug_token: str | None = None,
+    snapshot_interval: int | None = 32,
+    position_index=None,
+    time_source: Callable[[], float] = time.time,
+    batch_frames: bool = True,
+    compression: tuple[int, int] | None = (1024, 1),
+) -> fastapi.FastAPI:
     # The store holds each game's durable record: {"seats": [colors claimed],
     # "moves": [move dicts in wire format]}. In production it is a modal.Dict,
     # which returns deserialized copies — every mutation must read-modify-write
     # and write back before any await, so concurrent handlers on the shared
     # event loop can't interleave a stale write. Tests pass a plain dict.
+    # Every snapshot_interval plies the record also gains a board snapshot
+    # ("snapshots": [[ply, board]], see snapshots.py) so the position can be
+    # rebuilt without replaying the whole game. None or 0 turns snapshots off,
+    # and then every move of a timed game replays the game from the start.
+    if snapshot_interval is not None and snapshot_interval < 0:
+        raise ValueError("snapshot_interval must be positive, or 0/None to disable snapshots")
     if store is None:
         store = {}
-    web_app = fastapi.FastAPI()
+    # A socket silent for heartbeat_interval is pinged; one still silent
+    # heartbeat_timeout later is closed and detached from `connections`.
+    heartbeat = Heartbeat(
+        interval=heartbeat_interval,
+        timeout=heartbeat_timeout,
+        ping=Ping(type="ping").model_dump(mode="json"),
+    )
+
+    # Rate limits are (frames per second, burst) token buckets, checked before
+    # a frame is even parsed. A socket over its own limit is closed; a game
+    # over its shared limit has the frame refused (we can't tell which seat
+    # is flooding, and the per-connection limit will catch the culprit).
+    # None disables a limit.
+    def game_bucket(gid: str) -> TokenBucket | None:
+        if game_rate_limit is None:
+            return None
+        bucket = game_buckets.get(gid)
+        if bucket is None:
+            bucket = game_buckets[gid] = TokenBucket(*game_rate_limit)
+        return bucket
+
+    # position_index (a position_index.PositionIndex), if given, counts every
+    # accepted move as a continuation of the position it was played from. The
+    # counts are written by a background thread (IndexWriter), since an add
+    # that grows the table rewrites the whole file.
+    index_writer = None
+    if position_index is not None:
+        from position_index import IndexWriter
+
+        index_writer = IndexWriter(position_index)
+
+    def index_move(gid: str, record: dict) -> None:
+        from position_index import side_to_move
+        from rules import IllegalMove, apply_move, move_from_record, position_hash
+        from snapshots import position_at
+
+        ply = len(record["moves"]) - 1
+        cached = game_boards.get(gid)
+        try:
+            board = cached[1] if cached is not None and cached[0] == ply else position_at(record, ply)
+            move = move_from_record(record["moves"][ply])
+            child = apply_move(board, move)
+        except (IllegalMove, ValueError):
+            # Not replayable (the client froze here too): nothing to index
+            game_boards.pop(gid, None)
+            return
+        index_writer.add(position_hash(board, side_to_move(ply)), move)
+        game_boards[gid] = (ply + 1, child)
+
+    # Position analysis runs in worker processes (analysis_executor, if
+    # given, replaces the default pool) so it never blocks the socket loop.
+    # The analysis stack (rules tables, multiprocessing) is imported on first
+    # use: playing never needs it, so startup shouldn't pay for it.
+    analyzer = None
+
+    def get_analyzer():
+        nonlocal analyzer
+        if analyzer is None:
+            from analysis import Analyzer
+
+            analyzer = Analyzer(executor=analysis_executor)
+        return analyzer
+
+    # Games created with a timeControl carry a server-authoritative clock in
+    # their record (see clocks.py); time_source is the wall clock it reads.
+    # One scheduler task watches every running clock and flags the side to
+    # move when its time runs out.
+    async def broadcast(gid: str, payload: dict) -> None:
+        await _send_all([(sock, payload) for sock in connections.get(gid, {}).values()])
+
+    def game_over_payload(record: dict) -> dict:
+        clock = record["clock"]
+        loser = clock["flagged"]
+        over = GameOver(
+            type="game_over",
+            reason="timeout",
+            winner=Color("black" if loser == "white" else "white"),
+            clock=Clock(**clocks.wire(clock, _turn(record), time_source())),
+        )
+        return over.model_dump(mode="json")
+
+    def flag_if_expired(gid: str, record: dict) -> dict | None:
+        """Flag the side to move if its time is up; writes the record back.
+
+        Returns the game_over payload to broadcast, or None.
+        """
+        clock = record.get("clock")
+        if clock is None or clock["flagged"] is not None or clock["runningSince"] is None:
+            return None
+        side = _turn(record)
+        # The same comparison the scheduler uses, so the two always agree
+        if time_source() < clocks.deadline(clock, side):
+            return None
+        clocks.flag(clock, side)
+        store[gid] = record
+        clock_scheduler.cancel(gid)
+        return game_over_payload(record)
+
+    def ensure_scheduled(gid: str, record: dict) -> None:
+        # Running clocks survive restarts in the store but not in the
+        # scheduler; they are picked up again on the next rejoin.
+        clock = record.get("clock")
+        if clock is not None and clock["flagged"] is None and clock["runningSince"] is not None:
+            clock_scheduler.schedule(gid, clocks.deadline(clock, _turn(record)))
+
+    def position_is_final(record: dict) -> bool:
+        # Mate or stalemate stops the clock. Only clocked games pay for the
+        # rules import and this replay (at most one snapshot interval; the
+        # whole game when snapshots are off).
+        from rules import EMPTY, IllegalMove, color_of, legal_moves_from
+        from snapshots import position_at
+
+        side = _turn(record)
+        try:
+            board = position_at(record)
+            # One legal move is enough to keep playing; stop looking there
+            return not any(
+                legal_moves_from(board, sq)
+                for sq, piece in enumerate(board)
+                if piece != EMPTY and color_of(piece) == side
+            )
+        except (IllegalMove, ValueError):
+            # Not a position the rules can judge (e.g. a king was captured)
+            return False
+
+    async def on_deadline(gid: str) -> None:
+        record = store.get(gid)
+        if record is None:
+            return
+        payload = flag_if_expired(gid, record)
+        if payload is not None:
+            await broadcast(gid, payload)
+        else:
+            # Woke before the time actually ran out: try again then
+            ensure_scheduled(gid, record)
+
+    clock_scheduler = ClockScheduler(on_deadline, now=time_source)
+
+    # Loop-lag and slow-handler tracking are on by default (one timer task,
+    # one perf_counter pair per frame); the /debug routes retune them or
+    # start the sampling profiler live. They exist only when debug_token is
+    # set, and every call must present it as a bearer token.
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app: fastapi.FastAPI):
+        task = asyncio.create_task(heartbeat.run())
+        clock_task = asyncio.create_task(clock_scheduler.run())
+        instrumentation.start()
+        if index_writer is not None:
+            index_writer.start()
+        try:
+            yield
+        finally:
+            task.cancel()
+            clock_task.cancel()
+            instrumentation.stop()
+            if index_writer is not None:
+                index_writer.close()
+            if analyzer is not None:
+                analyzer.shutdown()
+
+    web_app = fastapi.FastAPI(lifespan=lifespan)
 
     @web_app.get("/health")
     async def health_check():
         return {"status": "healthy"}
 
+    def require_debug_token(authorization: str | None = Header(default=None)) -> None:
+        if debug_token is None:
+            raise HTTPException(status_code=404)
+        if authorization is None or not hmac.compare_digest(authorization, f"Bearer {debug_token}"):
+            raise HTTPException(status_code=401, detail="Bad debug token")
+
+    @web_app.get("/debug/instrumentation", dependencies=[fastapi.Depends(require_debug_token)])
+    async def get_instrumentation():
+        return instrumentation.snapshot()
+
+    @web_app.patch("/debug/instrumentation", dependencies=[fastapi.Depends(require_debug_token)])
+    async def update_instrumentation(settings: InstrumentationSettings):
+        def setting(field: str, scale: float = 1.0):
+            if field not in settings.model_fields_set:
+                return KEEP
+            value = getattr(settings, field)
+            return None if value is None else value * scale
+
+        instrumentation.configure(
+            lag_interval=setting("lagIntervalMs", 1 / 1000),
+            slow_handler_ms=setting("slowHandlerMs"),
+            profiler_interval=setting("profilerIntervalMs", 1 / 1000),
+        )
+        return instrumentation.snapshot()
+
+    @web_app.get("/debug/profile", dependencies=[fastapi.Depends(require_debug_token)])
+    async def get_profile():
+        """Folded stacks from the current or last profiler run (flamegraph.pl input)."""
+        profiler = instrumentation.profiler
+        return PlainTextResponse("" if profiler is None else profiler.folded())
+
+    async def analyze(record: dict, ply: int) -> dict:
+        from rules import IllegalMove
+        from snapshots import position_at
+
+        try:
+            board = position_at(record, ply)
+        except IllegalMove as exc:
+            raise HTTPException(status_code=422, detail={"ply": exc.ply, "message": str(exc)})
+        side = "white" if ply % 2 == 0 else "black"
+        try:
+            result = await get_analyzer().analyze(board, side)
+        except ValueError as exc:
+            # e.g. a record whose replay captured a king
+            raise HTTPException(status_code=422, detail={"ply": ply, "message": str(exc)})
+        return {"ply": ply, **result}
+
+    @web_app.get("/analysis/{game_id}")
+    async def analyze_game(game_id: str, ply: int | None = None):
+        """Analyze a stored game after ``ply`` moves (default: the latest)."""
+        record = store.get(game_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="No such game")
+        moves = record["moves"]
+        if ply is None:
+            ply = len(moves)
+        elif not 0 <= ply <= len(moves):
+            raise HTTPException(status_code=422, detail=f"ply must be between 0 and {len(moves)}")
+        return await analyze(record, ply)
+
+    @web_app.post("/analysis")
+    async def analyze_moves(request: AnalysisRequest):
+        """Analyze the position after an explicit move list."""
+        moves = [m.model_dump(mode="json", by_alias=True, exclude_none=True) for m in request.moves]
+        return await analyze({"moves": moves}, len(moves))
+
+    # Clients opt into frame batching (?batch=1) and compression of large
+    # frames (?compress=deflate-raw) on the connect URL; see outbox.py.
+    # batch_frames=False refuses batching; compression is (threshold bytes,
+    # zlib level 1-9), or None to refuse compression. Level 1 keeps most of
+    # the saving for a fraction of level 6's CPU (benchmarks/compression.py).
+    def make_outbox(ws: WebSocket) -> Outbox | None:
+        batch = batch_frames and ws.query_params.get("batch") == "1"
+        compress = compression is not None and ws.query_params.get("compress") == "deflate-raw"
+        if not (batch or compress):
+            return None
+        threshold, level = compression if compress else (None, 6)
+        return Outbox(ws, batch=batch, compress_threshold=threshold, compress_level=level)
+
     @web_app.websocket("/ws")
     async def ws_endpoint(ws: WebSocket):
         await ws.accept()
+        outbox = make_outbox(ws)
+        if outbox is not None:
+            outboxes[ws] = outbox
         player_color = None  # Track the player's color for this connection
         gid = None  # Track the game id for this connection
+
+        def detach() -> None:
+            match_queue.pop(ws, None)
+            if gid is not None and player_color is not None:
+                _remove_player(gid, player_color, ws)
+
+        def seat(game_id: str, color: str) -> None:
+            # Called from the opponent's handler when matchmaking pairs us
+            nonlocal gid, player_color
+            gid, player_color = game_id, color
+
+        heartbeat.watch(ws, on_dead=detach)
+        bucket = TokenBucket(*connection_rate_limit) if connection_rate_limit is not None else None
+        timing = None  # the frame being handled, until the next receive
         try:
             while True:
+                if timing is not None:
+                    instrumentation.finish_handler(timing, gid)
+                    timing = None
+                text = await ws.receive_text()
+                # Any frame proves the peer is alive, not just pongs
+                heartbeat.touch(ws)
+                timing = instrumentation.start_handler()
+                # Throttle before parsing: JSON decoding and schema validation
+                # are the costs a flood is trying to run up.
+                if bucket is not None and not bucket.take():
+                    with off_the_clock():
+                        await ws.close(code=1008, reason="Rate limit exceeded")
+                    return
+                shared = game_bucket(gid) if gid is not None else None
+                if shared is not None and not shared.take():
+                    err = Error(type="error", code="rate_limited", message="Too many messages for this game")
+                    await _safe_send(ws, err.model_dump(mode="json"))
+                    continue
                 try:
-                    data = await ws.receive_json()
+                    data = json.loads(text)
                 except ValueError:
                     # Frame was not valid JSON
                     err = Error(type="error", code="invalid_message", message="Message is not valid JSON")
@@ -106,6 +513,7 @@ def create_web_app(store=None) -> fastapi.FastAPI:
                     continue
                 try:
                     envelope = WebsocketV1MessageEnvelope.model_validate(data).root
+                    timing.label(envelope.type)
                 except ValidationError:
                     err = Error(
                         type="error",
@@ -115,15 +523,22 @@ def create_web_app(store=None) -> fastapi.FastAPI:
                     await _safe_send(ws, err.model_dump(mode="json"))
                     continue
 
-                if isinstance(envelope, CreateGame):
+                if isinstance(envelope, Pong):
+                    continue
+                elif isinstance(envelope, CreateGame):
                     if gid is not None:
                         err = Error(type="error", code="already_in_game", message="Already in a game")
                         await _safe_send(ws, err.model_dump(mode="json"))
                         continue
+                    match_queue.pop(ws, None)
                     gid = _new_game_id(store)
                     # Creator can be white or black, but white always moves first
                     player_color = random.choice(["white", "black"])
-                    store[gid] = {"seats": [player_color], "moves": []}
+                    record = {"seats": [player_color], "moves": []}
+                    if envelope.timeControl is not None:
+                        tc = envelope.timeControl
+                        record["clock"] = clocks.new_clock(tc.initialMs, tc.incrementMs)
+                    store[gid] = record
                     connections[gid] = {player_color: ws}
                     created = GameCreated(type="game_created", gameId=gid, color=Color(player_color))
                     await _safe_send(ws, created.model_dump(mode="json"))
@@ -144,20 +559,28 @@ def create_web_app(store=None) -> fastapi.FastAPI:
                         err = Error(type="error", code="game_full", message="Game full")
                         await _safe_send(ws, err.model_dump(mode="json"))
                         continue
+                    match_queue.pop(ws, None)
                     gid = envelope.gameId
                     player_color = available_colors[0]
                     record["seats"].append(player_color)
+                    clock = record.get("clock")
+                    if clock is not None:
+                        # Both seats are taken: White's clock starts now
+                        clocks.start(clock, time_source())
+                        clock_scheduler.schedule(gid, clocks.deadline(clock, "white"))
                     store[gid] = record
                     conns = connections.setdefault(gid, {})
                     conns[player_color] = ws
                     # Send GameStart to the connected players, white first
+                    starts = []
                     for col in ("white", "black"):
                         sock = conns.get(col)
                         if sock is not None:
-                            payload = GameStart(type="game_start", color=Color(col)).model_dump(
-                                mode="json", exclude_none=True
-                            )
-                            await _safe_send(sock, payload)
+                            start = GameStart(type="game_start", color=Color(col))
+                            if clock is not None:
+                                start.clock = Clock(**clocks.wire(clock, "white", time_source()))
+                            starts.append((sock, start.model_dump(mode="json", exclude_none=True)))
+                    await _send_all(starts)
                 elif isinstance(envelope, RejoinGame):
                     if gid is not None:
                         err = Error(type="error", code="already_in_game", message="Already in a game")
@@ -172,6 +595,7 @@ def create_web_app(store=None) -> fastapi.FastAPI:
                         err = Error(type="error", code="invalid_rejoin", message="No such seat to rejoin")
                         await _safe_send(ws, err.model_dump(mode="json"))
                         continue
+                    match_queue.pop(ws, None)
                     gid = envelope.gameId
                     player_color = envelope.color.value
                     # Last connection wins: a refresh's old socket can linger
@@ -180,22 +604,69 @@ def create_web_app(store=None) -> fastapi.FastAPI:
                     conns = connections.setdefault(gid, {})
                     old_ws = conns.get(player_color)
                     conns[player_color] = ws
-                    state = GameState.model_validate(
-                        {
-                            "type": "game_state",
-                            "color": player_color,
-                            "started": len(record["seats"]) == 2,
-                            "moves": record["moves"],
-                        }
-                    )
+                    flagged = flag_if_expired(gid, record)
+                    ensure_scheduled(gid, record)
+                    state = {
+                        "type": "game_state",
+                        "color": player_color,
+                        "started": len(record["seats"]) == 2,
+                        "moves": record["moves"],
+                    }
+                    clock = record.get("clock")
+                    if clock is not None:
+                        state["timeControl"] = {"initialMs": clock["initialMs"], "incrementMs": clock["incrementMs"]}
+                        state["clock"] = clocks.wire(clock, _turn(record), time_source())
+                    state = GameState.model_validate(state)
                     await _safe_send(ws, state.model_dump(mode="json", by_alias=True, exclude_none=True))
+                    if flagged is not None:
+                        await broadcast(gid, flagged)
+                    elif clock is not None and clock["flagged"] is not None:
+                        await _safe_send(ws, game_over_payload(record))
                     if old_ws is not None and old_ws is not ws:
                         try:
-                            await old_ws.close()
+                            with off_the_clock():
+                                await old_ws.close()
                         except Exception:
                             pass
+                elif isinstance(envelope, FindGame):
+                    if gid is not None:
+                        err = Error(type="error", code="already_in_game", message="Already in a game")
+                        await _safe_send(ws, err.model_dump(mode="json"))
+                        continue
+                    if ws in match_queue:
+                        continue
+                    if not match_queue:
+                        match_queue[ws] = seat
+                        continue
+                    # Pair with whoever has waited longest. Both seats are
+                    # claimed in the record (written before any await), so
+                    # the game starts at once and is never joinable by link.
+                    opponent, seat_opponent = match_queue.popitem(last=False)
+                    gid = _new_game_id(store)
+                    # The player who waited is seated like a creator
+                    opponent_color = random.choice(["white", "black"])
+                    player_color = "black" if opponent_color == "white" else "white"
+                    seats = {opponent_color: opponent, player_color: ws}
+                    store[gid] = {"seats": [opponent_color, player_color], "moves": []}
+                    connections[gid] = dict(seats)
+                    seat_opponent(gid, opponent_color)
+                    # game_created first: it carries the game id each
+                    # client needs to rejoin later
+                    created = []
+                    for col, sock in seats.items():
+                        payload = GameCreated(type="game_created", gameId=gid, color=Color(col)).model_dump(mode="json")
+                        created.append((sock, payload))
+                    await _send_all(created)
+                    starts = []
+                    for col in ("white", "black"):
+                        payload = GameStart(type="game_start", color=Color(col)).model_dump(
+                            mode="json", exclude_none=True
+                        )
+                        starts.append((seats[col], payload))
+                    await _send_all(starts)
                 elif isinstance(envelope, Move):
                     record = store.get(gid) if gid is not None else None
+                    flagged = flag_if_expired(gid, record) if record is not None else None
                     if record is None:
                         err = Error(type="error", code="invalid_move", message="Not in a game")
                         await _safe_send(ws, err.model_dump(mode="json"))
@@ -209,6 +680,12 @@ def create_web_app(store=None) -> fastapi.FastAPI:
                     elif _turn(record) != player_color:
                         err = Error(type="error", code="wrong_turn", message="Not your turn")
                         await _safe_send(ws, err.model_dump(mode="json"))
+                    elif record.get("clock") is not None and (
+                        record["clock"]["flagged"] is not None or record["clock"]["runningSince"] is None
+                    ):
+                        # Flagged, or stopped by mate or stalemate
+                        err = Error(type="error", code="game_over", message="The game is over")
+                        await _safe_send(ws, err.model_dump(mode="json"))
                     else:
                         # Record the move (write back before any await), then
                         # relay to whichever players are connected; an offline
@@ -217,11 +694,30 @@ def create_web_app(store=None) -> fastapi.FastAPI:
                         if envelope.promotion is not None:
                             move_dict["promotion"] = envelope.promotion.value
                         record["moves"].append(move_dict)
+                        if snapshot_interval and len(record["moves"]) % snapshot_interval == 0:
+                            from snapshots import maybe_snapshot
+
+                            maybe_snapshot(record, snapshot_interval)
+                        clock = record.get("clock")
+                        if clock is not None:
+                            clocks.press(clock, player_color, time_source())
+                            if position_is_final(record):
+                                clocks.stop(clock)
+                                clock_scheduler.cancel(gid)
+                            else:
+                                clock_scheduler.schedule(gid, clocks.deadline(clock, _turn(record)))
                         store[gid] = record
+                        if position_index is not None:
+                            index_move(gid, record)
                         move_made = MoveMade.model_validate({"type": "move_made", **move_dict})
+                        if clock is not None:
+                            move_made.clock = Clock(**clocks.wire(clock, _turn(record), time_source()))
                         payload = move_made.model_dump(mode="json", by_alias=True, exclude_none=True)
-                        for sock in list(connections.get(gid, {}).values()):
-                            await _safe_send(sock, payload)
+                        await broadcast(gid, payload)
+                    # Whichever refusal the mover got, a flag this move
+                    # discovered is news to both players
+                    if flagged is not None:
+                        await broadcast(gid, flagged)
                 else:
                     # Structurally valid, but a message type only the server may send
                     err = Error(
@@ -235,16 +731,38 @@ def create_web_app(store=None) -> fastapi.FastAPI:
         finally:
             # Detach this connection so later broadcasts don't hit a dead
             # socket. The durable record stays in the store for rejoins.
-            if gid is not None and player_color is not None:
-                _remove_player(gid, player_color, ws)
+            if timing is not None:
+                instrumentation.finish_handler(timing, gid)
+            heartbeat.forget(ws)
+            detach()
+            outboxes.pop(ws, None)
 
     return web_app
 
 
-@app.function(image=image, include_source=True, max_containers=1, timeout=3600)
+# enable_memory_snapshot: cold starts restore the container from a snapshot
+# taken after this module's imports, so fastapi/pydantic imports and the
+# message models' schema builds are paid once per deploy, not per cold start.
+# The store handle is created in serve(), after restore, and the module-level
+# random state is reseeded there: restored as-is, every container would deal
+# the same game ids and creator colors.
+@app.function(
+    image=image,
+    include_source=True,
+    max_containers=1,
+    timeout=3600,
+    enable_memory_snapshot=True,
+    secrets=_debug_secrets(),
+)
 @modal.concurrent(max_inputs=1000)
 @modal.asgi_app()
 def serve() -> fastapi.FastAPI:
+    random.seed()
     # Durable game records survive container restarts and expire via Modal's
     # ~30-day inactivity TTL, so abandoned games clean themselves up.
-    return create_web_app(store=modal.Dict.from_name("3d-chess-games", create_if_missing=True))
+    # DEBUG_TOKEN, from the DEBUG_SECRET_NAME secret (attached only if it
+    # existed at deploy time), enables the /debug routes.
+    return create_web_app(
+        store=modal.Dict.from_name(STORE_NAME, create_if_missing=True),
+        debug_token=os.environ.get("DEBUG_TOKEN"),
+    )
@@ -0,0 +1,83 @@
+"""Per-socket outbound frames: batched per loop tick, large ones compressed.
+
+Handlers queue payloads with ``put`` instead of awaiting a send each. The
+first payload queued in a loop tick schedules a flush for the end of that
+tick, so everything queued for the socket meanwhile — a pairing's
+game_created + game_start, a rejoin's game_state + game_over — leaves as one
+frame:
+
+- one payload goes out as-is, a JSON object, exactly as before batching;
+- several go out as a JSON array of those objects, in order.
+
+Both are opt-in per socket, so older clients keep getting one object per
+frame: ``?batch=1`` on the connect URL turns batching on, and a client that
+connected with ``?compress=deflate-raw`` also gets any frame
+of at least ``compress_threshold`` bytes as a binary frame holding the
+raw-DEFLATE-compressed JSON (no zlib header, no shared context between
+frames, so each frame inflates on its own). Smaller frames — almost every
+move — stay uncompressed text, so their latency is unchanged.
+
+Compression happens here, not in the WebSocket layer, because ASGI gives an
+app no control over permessage-deflate: whether the server negotiates it,
+and at what level, is fixed by the hosting server.
+"""
+
+import asyncio
+import json
+import zlib
+
+from fastapi import WebSocket
+
+
+def encode_frame(payloads: list[dict]) -> str:
+    return json.dumps(payloads[0] if len(payloads) == 1 else payloads, separators=(",", ":"))
+
+
+def deflate(text: str, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(text.encode()) + compressor.flush()
+
+
+class Outbox:
+    """Queue payloads for ``ws``; see the module docstring for the framing."""
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        *,
+        batch: bool = True,
+        compress_threshold: int | None = None,
+        compress_level: int = 6,
+    ):
+        self.ws = ws
+        self.batch = batch
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+        self.frames = 0  # frames actually sent, for tests and metrics
+        self._pending: list[dict] = []
+        self._flushing: asyncio.Task | None = None
+
+    def put(self, payload: dict) -> None:
+        self._pending.append(payload)
+        if self._flushing is None:
+            self._flushing = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        try:
+            # Sends can suspend; whatever was queued meanwhile goes next
+            while self._pending:
+                if self.batch:
+                    payloads, self._pending = self._pending, []
+                else:
+                    payloads = [self._pending.pop(0)]
+                text = encode_frame(payloads)
+                if self.compress_threshold is not None and len(text) >= self.compress_threshold:
+                    await self.ws.send_bytes(deflate(text, self.compress_level))
+                else:
+                    await self.ws.send_text(text)
+                self.frames += 1
+        except Exception:
+            # The socket is gone; its handler's cleanup deals with that
+            self._pending.clear()
+        finally:
+            self._flushing = None
@@ -0,0 +1,289 @@
+"""Cross-game position index: how often each position occurred, and what was played next.
+
+Positions recur constantly across games — every game starts from the same
+setup — so the index is keyed by position (Zobrist hash, side to move
+included) rather than by game. Each entry counts the moves played from that
+position, in total and per continuation, which is what opening statistics
+and an opening book need without rescanning every game.
+
+The index is a file-backed open-addressing hash table, memory-mapped, so a
+lookup touches a few slots and never loads the file. Layout (little-endian):
+
+    header  64 bytes   magic "3DPX", version u16, continuations K u16,
+                       capacity u64 (a power of two), used slots u64
+    slots   capacity × (key u64, total u32, K × (move code u32, count u32))
+
+Key 0 marks an empty slot (a position hashing to 0 is stored as 1). A
+position tracks at most K continuations, "space-saving" style: a move that
+finds them all taken replaces the least played one and starts from its
+count plus one. A popular move therefore always gets a place, at the cost of
+counts that are upper bounds (exact for moves that never displaced another);
+``total`` is always exact. The table doubles (rewriting the file) past 70%
+load.
+One process writes at a time; a server feeding the index live does so
+through an IndexWriter thread, so a resize never blocks its event loop.
+
+Usage:
+
+    python position_index.py build index.bin games.jsonl.gz [more.jsonl.gz ...]
+    python position_index.py show index.bin "Aa2Aa3 Ea4Ea3"
+"""
+
+import argparse
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+from typing import NamedTuple
+
+from rules import (
+    NUM_SQUARES,
+    PROMOTIONS,
+    IllegalMove,
+    Move,
+    apply_move,
+    move_from_record,
+    position_hash,
+    starting_position,
+)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"3DPX"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQ")
+HEADER_SIZE = 64
+_KEY = struct.Struct("<Q")  # the leading field of a slot
+MAX_LOAD = 0.7
+_PROMOTION_CODES = (None, *PROMOTIONS)
+
+
+class PositionStats(NamedTuple):
+    total: int
+    continuations: list[tuple[Move, int]]  # most played first
+
+
+def encode_move(move: Move) -> int:
+    # 0 is reserved for an empty continuation slot
+    return (move.from_ * NUM_SQUARES + move.to) * len(_PROMOTION_CODES) + _PROMOTION_CODES.index(move.promotion) + 1
+
+
+def decode_move(code: int) -> Move:
+    squares, promotion = divmod(code - 1, len(_PROMOTION_CODES))
+    from_, to = divmod(squares, NUM_SQUARES)
+    return Move(from_, to, _PROMOTION_CODES[promotion])
+
+
+def side_to_move(ply: int) -> str:
+    return "white" if ply % 2 == 0 else "black"
+
+
+class PositionIndex:
+    """A PositionIndex backed by the file at ``path`` (created if missing)."""
+
+    def __init__(self, path: str, *, capacity: int = 1 << 16, continuations: int = 8):
+        self.path = path
+        if not os.path.exists(path):
+            if capacity & (capacity - 1):
+                raise ValueError("capacity must be a power of two")
+            _create(path, capacity, continuations)
+        self._open()
+
+    def _open(self) -> None:
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, self.k, self.capacity, self.used = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} position index")
+        self._slot = struct.Struct(f"<QI{2 * self.k}I")
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "PositionIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.used
+
+    def _find(self, key: int) -> tuple[int, tuple]:
+        """Offset and contents of ``key``'s slot, or of the empty slot it would take."""
+        key = key or 1
+        mask = self.capacity - 1
+        i = key & mask
+        while True:
+            offset = HEADER_SIZE + i * self._slot.size
+            slot = self._slot.unpack_from(self._map, offset)
+            if slot[0] == key or slot[0] == 0:
+                return offset, slot
+            i = (i + 1) & mask
+
+    def lookup(self, key: int) -> PositionStats | None:
+        _, slot = self._find(key)
+        if slot[0] == 0:
+            return None
+        pairs = zip(slot[2::2], slot[3::2])
+        continuations = sorted(((decode_move(code), count) for code, count in pairs if code), key=lambda p: -p[1])
+        return PositionStats(slot[1], continuations)
+
+    def stats(self, board: list[str], side: str) -> PositionStats | None:
+        return self.lookup(position_hash(board, side))
+
+    def add(self, key: int, move: Move) -> None:
+        """Count ``move`` as played from the position hashed to ``key``."""
+        offset, slot = self._find(key)
+        if slot[0] == 0:
+            if self.used + 1 > self.capacity * MAX_LOAD:
+                self._grow()
+                offset, slot = self._find(key)
+            self.used += 1
+            HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.k, self.capacity, self.used)
+            slot = (key or 1, 0) + (0,) * (2 * self.k)
+        slot = list(slot)
+        slot[1] += 1
+        code = encode_move(move)
+        for j in range(2, len(slot), 2):
+            if slot[j] == code:
+                slot[j + 1] += 1
+                break
+            if slot[j] == 0:
+                slot[j], slot[j + 1] = code, 1
+                break
+        else:
+            # Every continuation is taken: evict the least played
+            j = min(range(3, len(slot), 2), key=slot.__getitem__) - 1
+            slot[j], slot[j + 1] = code, slot[j + 1] + 1
+        self._slot.pack_into(self._map, offset, *slot)
+
+    def add_game(self, moves: list[dict]) -> int:
+        """Index every move of a game; stops at the first unappliable one.
+
+        Returns the number of moves indexed.
+        """
+        board = starting_position()
+        for ply, record in enumerate(moves):
+            try:
+                move = move_from_record(record)
+                child = apply_move(board, move)
+            except (IllegalMove, ValueError):
+                return ply
+            self.add(position_hash(board, side_to_move(ply)), move)
+            board = child
+        return len(moves)
+
+    def _grow(self) -> None:
+        # Rehash slot by slot from the old map into the new file, so a resize
+        # never holds more than one slot of either table in memory.
+        size = self._slot.size
+        capacity = self.capacity * 2
+        tmp = self.path + ".tmp"
+        _create(tmp, capacity, self.k)
+        with open(tmp, "r+b") as f, mmap.mmap(f.fileno(), 0) as m:
+            mask = capacity - 1
+            used = 0
+            for old_offset in range(HEADER_SIZE, HEADER_SIZE + self.capacity * size, size):
+                (key,) = _KEY.unpack_from(self._map, old_offset)
+                if key == 0:
+                    continue
+                i = key & mask
+                while _KEY.unpack_from(m, HEADER_SIZE + i * size)[0]:
+                    i = (i + 1) & mask
+                offset = HEADER_SIZE + i * size
+                m[offset : offset + size] = self._map[old_offset : old_offset + size]
+                used += 1
+            HEADER.pack_into(m, 0, MAGIC, VERSION, self.k, capacity, used)
+        self.close()
+        os.replace(tmp, self.path)
+        self._open()
+
+
+class IndexWriter:
+    """Apply ``add`` calls to ``index`` on a background thread, in order.
+
+    A live server counts moves as they are played, and the add that crosses
+    the load limit rewrites the whole table, which must not happen on the
+    event loop. While the writer runs, its thread is the only one touching
+    the index.
+    """
+
+    def __init__(self, index: PositionIndex):
+        self.index = index
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="position-index-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, key: int, move: Move) -> None:
+        self._queue.put((key, move))
+
+    def close(self) -> None:
+        """Apply everything queued so far, then stop the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while (item := self._queue.get()) is not None:
+            try:
+                self.index.add(*item)
+            except Exception:
+                logger.exception("position index update failed")
+
+
+def _create(path: str, capacity: int, continuations: int) -> None:
+    slot_size = struct.calcsize(f"<QI{2 * continuations}I")
+    with open(path, "wb") as f:
+        f.truncate(HEADER_SIZE + capacity * slot_size)
+        f.write(HEADER.pack(MAGIC, VERSION, continuations, capacity, 0))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index every game in one or more archives")
+    build.add_argument("index")
+    build.add_argument("archives", nargs="+")
+    show = sub.add_parser("show", help="statistics for the position after a move sequence")
+    show.add_argument("index")
+    show.add_argument("moves", nargs="?", default="", help='compact notation, e.g. "Aa2Aa3 Ea4Ea3"')
+    args = parser.parse_args(argv)
+
+    from archive import decode_moves, encode_moves, read_archive
+    from rules import move_to_record
+
+    with PositionIndex(args.index) as index:
+        if args.command == "build":
+            games = moves = 0
+            for path in args.archives:
+                for _, record in read_archive(path):
+                    games += 1
+                    moves += index.add_game(record["moves"])
+            print(f"indexed {moves} moves from {games} games; {len(index)} distinct positions")
+            return
+        moves = decode_moves(args.moves)
+        board = starting_position()
+        for record in moves:
+            board = apply_move(board, move_from_record(record))
+        side = side_to_move(len(moves))
+        stats = index.stats(board, side)
+        if stats is None:
+            print("position not in the index")
+            return
+        print(f"played from {stats.total} times")
+        for move, count in stats.continuations:
+            print(f"  {encode_moves([move_to_record(move, side)])}  {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Token buckets for throttling inbound websocket frames.
+
+A bucket is four floats and one subtraction per frame, so one can sit on
+every connection and every live game without measurable cost. Refill is
+computed lazily from the elapsed time on each take — no timers.
+"""
+
+import time
+
+
+class TokenBucket:
+    """Allow ``rate`` events per second on average, bursts up to ``capacity``."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: float | None = None) -> bool:
+        """Spend one token; False means the caller is over its limit."""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
@@ -0,0 +1,368 @@
+"""Server-side rules engine for the 5×5×5 variant.
+
+A port of the client engine (client/src/engine/board.ts), which stays the
+authority for play: this module exists so batch tools can check stored
+records offline. Keep the two in step when the rules change.
+
+Squares are flat indices ``z * 25 + x * 5 + y`` (level, file, rank — the same
+nesting as the client's ``grid[z][x][y]``). A position is a 125-element list
+of one-character pieces: ``KQRBNUP`` for White, lowercase for Black, ``.``
+for an empty square. Moves are ``(from, to, promotion)`` tuples where
+promotion is a wire letter (``Q R B N U``) or None.
+"""
+
+import random
+from typing import Iterator, NamedTuple
+
+LEVELS = "ABCDE"  # z
+FILES = "abcde"  # x
+RANKS = "12345"  # y
+SIZE = 5
+NUM_SQUARES = SIZE**3
+EMPTY = "."
+PROMOTIONS = ("Q", "R", "B", "N", "U")
+
+
+class Move(NamedTuple):
+    from_: int
+    to: int
+    promotion: str | None = None
+
+
+class IllegalMove(ValueError):
+    """A recorded move that cannot be played in the position it was made in."""
+
+
+def index(x: int, y: int, z: int) -> int:
+    return z * 25 + x * 5 + y
+
+
+def coords(sq: int) -> tuple[int, int, int]:
+    """Return (x, y, z) for a square index."""
+    z, rest = divmod(sq, 25)
+    x, y = divmod(rest, 5)
+    return x, y, z
+
+
+def square(name: str) -> int:
+    """Parse a wire square such as ``"Aa1"``."""
+    if len(name) != 3 or name[0] not in LEVELS or name[1] not in FILES or name[2] not in RANKS:
+        raise ValueError(f"Invalid square: {name!r}")
+    return index(FILES.index(name[1]), RANKS.index(name[2]), LEVELS.index(name[0]))
+
+
+def square_name(sq: int) -> str:
+    x, y, z = coords(sq)
+    return LEVELS[z] + FILES[x] + RANKS[y]
+
+
+def color_of(piece: str) -> str:
+    return "white" if piece.isupper() else "black"
+
+
+def opponent(color: str) -> str:
+    return "black" if color == "white" else "white"
+
+
+def _inside(x: int, y: int, z: int) -> bool:
+    return 0 <= x < SIZE and 0 <= y < SIZE and 0 <= z < SIZE
+
+
+# Direction vectors as (dx, dy, dz): one nonzero axis for the rook, two for
+# the bishop, three for the unicorn.
+_UNIT = (-1, 0, 1)
+_DIRECTIONS = [(dx, dy, dz) for dx in _UNIT for dy in _UNIT for dz in _UNIT if (dx, dy, dz) != (0, 0, 0)]
+ROOK_VECTORS = [d for d in _DIRECTIONS if sum(map(abs, d)) == 1]
+BISHOP_VECTORS = [d for d in _DIRECTIONS if sum(map(abs, d)) == 2]
+UNICORN_VECTORS = [d for d in _DIRECTIONS if sum(map(abs, d)) == 3]
+QUEEN_VECTORS = ROOK_VECTORS + BISHOP_VECTORS + UNICORN_VECTORS
+KNIGHT_VECTORS = sorted(
+    {
+        (a * sa, b * sb, c * sc)
+        for a, b, c in {(2, 1, 0), (2, 0, 1), (1, 2, 0), (0, 2, 1), (1, 0, 2), (0, 1, 2)}
+        for sa in (-1, 1)
+        for sb in (-1, 1)
+        for sc in (-1, 1)
+    }
+)
+
+
+def _rays(vectors) -> list[list[list[int]]]:
+    """Per square, per direction: the squares a slider passes through in order."""
+    table = []
+    for sq in range(NUM_SQUARES):
+        x, y, z = coords(sq)
+        per_square = []
+        for dx, dy, dz in vectors:
+            ray = []
+            n = 1
+            while _inside(x + dx * n, y + dy * n, z + dz * n):
+                ray.append(index(x + dx * n, y + dy * n, z + dz * n))
+                n += 1
+            if ray:
+                per_square.append(ray)
+        table.append(per_square)
+    return table
+
+
+def _steps(vectors) -> list[list[int]]:
+    table = []
+    for sq in range(NUM_SQUARES):
+        x, y, z = coords(sq)
+        table.append([index(x + dx, y + dy, z + dz) for dx, dy, dz in vectors if _inside(x + dx, y + dy, z + dz)])
+    return table
+
+
+ROOK_RAYS = _rays(ROOK_VECTORS)
+BISHOP_RAYS = _rays(BISHOP_VECTORS)
+UNICORN_RAYS = _rays(UNICORN_VECTORS)
+QUEEN_RAYS = _rays(QUEEN_VECTORS)
+KING_STEPS = _steps(QUEEN_VECTORS)
+KNIGHT_STEPS = _steps(KNIGHT_VECTORS)
+SLIDER_RAYS = {"R": ROOK_RAYS, "B": BISHOP_RAYS, "U": UNICORN_RAYS, "Q": QUEEN_RAYS}
+LEAPER_STEPS = {"K": KING_STEPS, "N": KNIGHT_STEPS}
+
+
+def _pawn_tables(direction: int) -> tuple[list[list[int]], list[list[int]]]:
+    """(pushes, captures) per square for a pawn moving in ``direction``."""
+    pushes = _steps([(0, direction, 0), (0, 0, direction)])
+    captures = _steps(
+        [
+            (0, direction, direction),  # forward-up
+            (-1, direction, 0),  # forward-left
+            (1, direction, 0),  # forward-right
+            (-1, 0, direction),  # up-left
+            (1, 0, direction),  # up-right
+        ]
+    )
+    return pushes, captures
+
+
+PAWN_PUSHES = {}
+PAWN_CAPTURES = {}
+PAWN_PUSHES["white"], PAWN_CAPTURES["white"] = _pawn_tables(1)
+PAWN_PUSHES["black"], PAWN_CAPTURES["black"] = _pawn_tables(-1)
+# The squares from which a pawn of the given color attacks each square.
+PAWN_ATTACKERS = {color: [[] for _ in range(NUM_SQUARES)] for color in ("white", "black")}
+for _color, _table in PAWN_CAPTURES.items():
+    for _from, _targets in enumerate(_table):
+        for _to in _targets:
+            PAWN_ATTACKERS[_color][_to].append(_from)
+
+
+def is_promotion_square(sq: int, color: str) -> bool:
+    _, y, z = coords(sq)
+    if color == "white":
+        return y == SIZE - 1 and z == SIZE - 1
+    return y == 0 and z == 0
+
+
+def starting_position() -> list[str]:
+    """The fixed starting setup (Board.setupStartingPosition on the client)."""
+    board = [EMPTY] * NUM_SQUARES
+    for x in range(SIZE):
+        board[index(x, 1, 0)] = board[index(x, 1, 1)] = "P"
+        board[index(x, 3, 4)] = board[index(x, 3, 3)] = "p"
+    for x, piece in enumerate("RNKNR"):
+        board[index(x, 0, 0)] = piece
+    for x, piece in enumerate("BUQBU"):
+        board[index(x, 0, 1)] = piece
+    for x, piece in enumerate("rnknr"):
+        board[index(x, 4, 4)] = piece
+    for x, piece in enumerate("ubqub"):
+        board[index(x, 4, 3)] = piece
+    return board
+
+
+def potential_moves(board: list[str], sq: int) -> Iterator[Move]:
+    """Moves for the piece on ``sq`` ignoring whether they expose its king."""
+    piece = board[sq]
+    if piece == EMPTY:
+        raise ValueError(f"No piece at {square_name(sq)}")
+    color = color_of(piece)
+    kind = piece.upper()
+    if kind == "P":
+        for to in PAWN_PUSHES[color][sq]:
+            if board[to] == EMPTY:
+                yield from _pawn_moves(sq, to, color)
+        for to in PAWN_CAPTURES[color][sq]:
+            target = board[to]
+            if target != EMPTY and color_of(target) != color:
+                yield from _pawn_moves(sq, to, color)
+        return
+    if kind in LEAPER_STEPS:
+        for to in LEAPER_STEPS[kind][sq]:
+            target = board[to]
+            if target == EMPTY or color_of(target) != color:
+                yield Move(sq, to)
+        return
+    for ray in SLIDER_RAYS[kind][sq]:
+        for to in ray:
+            target = board[to]
+            if target == EMPTY:
+                yield Move(sq, to)
+                continue
+            if color_of(target) != color:
+                yield Move(sq, to)
+            break
+
+
+def _pawn_moves(sq: int, to: int, color: str) -> Iterator[Move]:
+    if is_promotion_square(to, color):
+        for promotion in PROMOTIONS:
+            yield Move(sq, to, promotion)
+    else:
+        yield Move(sq, to)
+
+
+def apply_move(board: list[str], move: Move) -> list[str]:
+    """Return a new position with ``move`` played (no legality check).
+
+    Mirrors Board.applyMove: promotion is required exactly when a pawn lands
+    on its promotion square.
+    """
+    piece = board[move.from_]
+    if piece == EMPTY:
+        raise IllegalMove(f"No piece at {square_name(move.from_)}")
+    color = color_of(piece)
+    if piece.upper() == "P" and is_promotion_square(move.to, color):
+        if move.promotion not in PROMOTIONS:
+            raise IllegalMove(f"Pawn moving to {square_name(move.to)} requires a valid promotion")
+        piece = move.promotion if color == "white" else move.promotion.lower()
+    elif move.promotion is not None:
+        raise IllegalMove(f"{square_name(move.from_)} -> {square_name(move.to)} is not a pawn promotion")
+    after = board.copy()
+    after[move.from_] = EMPTY
+    after[move.to] = piece
+    return after
+
+
+def find_king(board: list[str], color: str) -> int:
+    king = "K" if color == "white" else "k"
+    try:
+        return board.index(king)
+    except ValueError:
+        raise ValueError(f"King of color {color} not found") from None
+
+
+def is_attacked(board: list[str], sq: int, by_color: str) -> bool:
+    """True if a ``by_color`` piece could capture a piece standing on ``sq``.
+
+    Walks outward from the target instead of generating every enemy move,
+    which is what makes batch replay affordable.
+    """
+    upper = by_color == "white"
+
+    def own(kind: str) -> str:
+        return kind if upper else kind.lower()
+
+    for kind, table in (("R", ROOK_RAYS), ("B", BISHOP_RAYS), ("U", UNICORN_RAYS)):
+        sliders = (own(kind), own("Q"))
+        for ray in table[sq]:
+            for to in ray:
+                target = board[to]
+                if target == EMPTY:
+                    continue
+                if target in sliders:
+                    return True
+                break
+    king, knight, pawn = own("K"), own("N"), own("P")
+    if any(board[s] == king for s in KING_STEPS[sq]):
+        return True
+    if any(board[s] == knight for s in KNIGHT_STEPS[sq]):
+        return True
+    return any(board[s] == pawn for s in PAWN_ATTACKERS[by_color][sq])
+
+
+def in_check(board: list[str], color: str) -> bool:
+    return is_attacked(board, find_king(board, color), opponent(color))
+
+
+def legal_moves_from(board: list[str], sq: int) -> list[Move]:
+    color = color_of(board[sq])
+    return [m for m in potential_moves(board, sq) if not in_check(apply_move(board, m), color)]
+
+
+def legal_moves(board: list[str], color: str) -> list[Move]:
+    moves = []
+    for sq, piece in enumerate(board):
+        if piece != EMPTY and color_of(piece) == color:
+            moves.extend(legal_moves_from(board, sq))
+    return moves
+
+
+def is_checkmate(board: list[str], color: str) -> bool:
+    return in_check(board, color) and not legal_moves(board, color)
+
+
+def is_stalemate(board: list[str], color: str) -> bool:
+    return not in_check(board, color) and not legal_moves(board, color)
+
+
+def move_from_record(record: dict) -> Move:
+    """Convert a wire/stored move dict into a Move."""
+    return Move(square(record["from"]), square(record["to"]), record.get("promotion"))
+
+
+def move_to_record(move: Move, by: str) -> dict:
+    record = {"by": by, "from": square_name(move.from_), "to": square_name(move.to)}
+    if move.promotion is not None:
+        record["promotion"] = move.promotion
+    return record
+
+
+def play(board: list[str], record: dict, ply: int) -> list[str]:
+    """Play one recorded move after checking it fully; raises IllegalMove."""
+    mover = "white" if ply % 2 == 0 else "black"
+    if record.get("by", mover) != mover:
+        raise IllegalMove(f"Recorded as {record['by']}'s move on {mover}'s turn")
+    try:
+        move = move_from_record(record)
+    except ValueError as exc:
+        raise IllegalMove(str(exc)) from None
+    piece = board[move.from_]
+    if piece == EMPTY:
+        raise IllegalMove(f"No piece at {record['from']}")
+    if color_of(piece) != mover:
+        raise IllegalMove(f"{record['from']} holds a {color_of(piece)} piece on {mover}'s turn")
+    candidates = list(potential_moves(board, move.from_))
+    if move not in candidates:
+        if any(c.to == move.to for c in candidates):
+            raise IllegalMove(f"Invalid promotion for {record['from']} -> {record['to']}")
+        raise IllegalMove(f"{record['from']} cannot move to {record['to']}")
+    after = apply_move(board, move)
+    if in_check(after, mover):
+        raise IllegalMove(f"{record['from']} -> {record['to']} leaves the {mover} king in check")
+    return after
+
+
+def replay(moves: list[dict], board: list[str] | None = None, first_ply: int = 0) -> list[str]:
+    """Replay recorded moves from ``board`` (default: the starting setup).
+
+    Raises IllegalMove with ``.ply`` set to the first move that cannot be
+    played; earlier moves are known good.
+    """
+    board = starting_position() if board is None else board
+    for i, record in enumerate(moves):
+        try:
+            board = play(board, record, first_ply + i)
+        except IllegalMove as exc:
+            exc.ply = first_ply + i
+            raise
+    return board
+
+
+# Zobrist keys: a position's hash is the XOR of one key per occupied square
+# (plus one for Black to move), so equal positions hash equally no matter how
+# they were reached. Seeded, so hashes are stable across processes and runs.
+_zobrist_rng = random.Random(0x3D5C4E55)
+ZOBRIST = {piece: [_zobrist_rng.getrandbits(64) for _ in range(NUM_SQUARES)] for piece in "KQRBNUPkqrbnup"}
+ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
+
+
+def position_hash(board: list[str], side_to_move: str) -> int:
+    h = ZOBRIST_BLACK_TO_MOVE if side_to_move == "black" else 0
+    for sq, piece in enumerate(board):
+        if piece != EMPTY:
+            h ^= ZOBRIST[piece][sq]
+    return h
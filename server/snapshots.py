@@ -0,0 +1,69 @@
+"""Periodic position snapshots stored alongside a game's move log.
+
+Every ``interval`` plies the record gains a snapshot of the board — a
+125-character string, one character per square in rules.py's order — so
+any consumer that needs the current position (analysis, adjudication,
+indexing) replays at most ``interval`` moves from the latest snapshot
+instead of the whole game:
+
+    {"seats": [...], "moves": [...], "snapshots": [[32, "RNKNR..."], [64, "..."]]}
+
+Replay applies moves the way the client does (rules.apply_move, no legality
+audit), so a snapshot is exactly the board the players were shown. Records
+written before snapshots existed simply have none and replay from the start.
+"""
+
+from rules import IllegalMove, apply_move, move_from_record, starting_position
+
+DEFAULT_INTERVAL = 32
+
+
+def encode_board(board: list[str]) -> str:
+    return "".join(board)
+
+
+def decode_board(text: str) -> list[str]:
+    return list(text)
+
+
+def replay_from(board: list[str], moves: list[dict], first_ply: int = 0) -> list[str]:
+    """Apply ``moves`` to ``board``; IllegalMove carries the failing ``.ply``."""
+    for i, record in enumerate(moves):
+        try:
+            board = apply_move(board, move_from_record(record))
+        except (IllegalMove, ValueError) as exc:
+            error = IllegalMove(str(exc))
+            error.ply = first_ply + i
+            raise error from None
+    return board
+
+
+def position_at(record: dict, ply: int | None = None) -> list[str]:
+    """The board after ``ply`` moves of ``record`` (default: all of them)."""
+    moves = record["moves"]
+    ply = len(moves) if ply is None else ply
+    base_ply, board = 0, None
+    for snap_ply, text in reversed(record.get("snapshots", [])):
+        if snap_ply <= ply:
+            base_ply, board = snap_ply, decode_board(text)
+            break
+    if board is None:
+        board = starting_position()
+    return replay_from(board, moves[base_ply:ply], base_ply)
+
+
+def maybe_snapshot(record: dict, interval: int = DEFAULT_INTERVAL) -> None:
+    """Add a snapshot to ``record`` in place if its last move landed on the interval.
+
+    Call after appending a move and before writing the record back. A record
+    the client itself couldn't replay gets no snapshot; readers fall back to
+    the previous one.
+    """
+    ply = len(record["moves"])
+    if ply == 0 or ply % interval:
+        return
+    try:
+        board = position_at(record, ply)
+    except IllegalMove:
+        return
+    record.setdefault("snapshots", []).append([ply, encode_board(board)])
@@ -0,0 +1,115 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+import modal_app
+from analysis import Analyzer, analyze_position
+from modal_app import create_web_app
+from rules import EMPTY, square, starting_position
+from snapshots import replay_from
+
+OPENING = [
+    {"by": "white", "from": "Aa2", "to": "Aa3"},
+    {"by": "black", "from": "Ea4", "to": "Ea3"},
+]
+
+
+@pytest.fixture()
+def store():
+    return {"GAME01": {"seats": ["white", "black"], "moves": OPENING}}
+
+
+@pytest.fixture()
+def client(store):
+    modal_app.connections.clear()
+    with ThreadPoolExecutor(2) as pool:
+        with TestClient(create_web_app(store=store, analysis_executor=pool)) as c:
+            yield c
+
+
+def test_identical_concurrent_requests_share_one_computation():
+    async def run():
+        analyzer = Analyzer(executor=ThreadPoolExecutor(2))
+        board = starting_position()
+        results = await asyncio.gather(*(analyzer.analyze(board, "white") for _ in range(20)))
+        assert analyzer.computed == 1
+        assert all(r is results[0] for r in results)
+        # A later request is a cache hit
+        await analyzer.analyze(board, "white")
+        assert analyzer.computed == 1
+        # The same squares with the other side to move are a different position
+        await analyzer.analyze(board, "black")
+        assert analyzer.computed == 2
+
+    asyncio.run(run())
+
+
+def test_cache_evicts_least_recently_used():
+    async def run():
+        analyzer = Analyzer(executor=ThreadPoolExecutor(1), cache_size=1)
+        first, second = starting_position(), replay_from(starting_position(), OPENING[:1])
+        await analyzer.analyze(first, "white")
+        await analyzer.analyze(second, "black")
+        await analyzer.analyze(first, "white")
+        assert analyzer.computed == 3
+
+    asyncio.run(run())
+
+
+def test_analyze_stored_game(client):
+    resp = client.get("/analysis/GAME01")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["ply"] == 2
+    assert body["sideToMove"] == "white"
+    assert body["inCheck"] is False
+    assert body["checkmate"] is False
+    assert {"by": "white", "from": "Aa3", "to": "Aa4"} in body["legalMoves"]
+    assert body["bestMove"] in body["legalMoves"]
+
+    start = client.get("/analysis/GAME01", params={"ply": 0}).json()
+    assert start["sideToMove"] == "white"
+    assert start["evaluation"] == 0  # the starting setup is symmetric
+
+
+def test_analyze_unknown_game_or_bad_ply(client):
+    assert client.get("/analysis/NOPE99").status_code == 404
+    assert client.get("/analysis/GAME01", params={"ply": 3}).status_code == 422
+
+
+def test_analyze_move_list(client):
+    resp = client.post("/analysis", json={"moves": OPENING[:1]})
+    assert resp.status_code == 200
+    assert resp.json()["sideToMove"] == "black"
+
+    resp = client.post("/analysis", json={"moves": [{"by": "white", "from": "Cc3", "to": "Cc4"}]})
+    assert resp.status_code == 422
+    assert resp.json()["detail"]["ply"] == 0
+
+
+def test_posted_move_list_is_capped(client):
+    move = {"by": "white", "from": "Ab1", "to": "Ac3"}
+    resp = client.post("/analysis", json={"moves": [move] * (modal_app.MAX_ANALYSIS_MOVES + 1)})
+    assert resp.status_code == 422
+
+
+def test_checkmate_is_reported():
+    board = [EMPTY] * 125
+    for name, piece in (("Ee5", "k"), ("Dd4", "Q"), ("Cc3", "K")):
+        board[square(name)] = piece
+    result = analyze_position("".join(board), "black")
+    assert result["inCheck"] and result["checkmate"]
+    assert result["legalMoves"] == []
+    assert result["bestMove"] is None
+
+    # One move earlier, the one-ply search finds the mate
+    board[square("Dd4")], board[square("Cc4")] = EMPTY, "Q"
+    result = analyze_position("".join(board), "white")
+    assert result["bestMove"] == {"by": "white", "from": "Cc4", "to": "Dd4"}
+
+
+def test_default_pool_runs_in_worker_processes(store):
+    with TestClient(create_web_app(store=store)) as c:
+        assert c.get("/analysis/GAME01").status_code == 200
@@ -0,0 +1,74 @@
+import gzip
+
+from archive import decode_moves, encode_moves, export_archive, import_archive, read_archive
+
+
+MOVES = [
+    {"by": "white", "from": "Aa2", "to": "Aa3"},
+    {"by": "black", "from": "Ea4", "to": "Ea3"},
+    {"by": "white", "from": "Db4", "to": "Eb5", "promotion": "U"},
+]
+
+
+def test_compact_move_notation_round_trips():
+    text = encode_moves(MOVES)
+    assert text == "Aa2Aa3 Ea4Ea3 Db4Eb5U"
+    assert decode_moves(text) == MOVES
+    assert decode_moves("") == []
+
+
+def test_export_then_import_restores_every_record(tmp_path):
+    store = {
+        "GAME01": {"seats": ["white", "black"], "moves": MOVES},
+        "GAME02": {"seats": ["black"], "moves": []},
+    }
+    path = str(tmp_path / "games.jsonl.gz")
+    assert export_archive(store, path) == 2
+    # One compressed JSON line per game
+    with gzip.open(path, "rt") as f:
+        assert len(f.read().splitlines()) == 2
+
+    restored = {}
+    assert import_archive(path, restored, batch_size=1) == 2
+    assert restored == store
+
+
+def test_clocks_round_trip(tmp_path):
+    clock = {
+        "initialMs": 600_000,
+        "incrementMs": 5_000,
+        "whiteMs": 592_500,
+        "blackMs": 0,
+        "runningSince": None,
+        "flagged": "black",
+    }
+    store = {"GAME01": {"seats": ["white", "black"], "moves": MOVES[:1], "clock": clock}}
+    path = str(tmp_path / "games.jsonl.gz")
+    export_archive(store, path)
+    restored = {}
+    import_archive(path, restored)
+    assert restored == store
+
+
+def test_import_skips_live_games_unless_overwriting(tmp_path):
+    path = str(tmp_path / "games.jsonl.gz")
+    export_archive({"GAME01": {"seats": ["white"], "moves": []}}, path)
+    live = {"GAME01": {"seats": ["white", "black"], "moves": MOVES}}
+
+    assert import_archive(path, live) == 0
+    assert live["GAME01"]["moves"] == MOVES
+    assert import_archive(path, live, overwrite=True) == 1
+    assert live["GAME01"] == {"seats": ["white"], "moves": []}
+
+
+def test_export_streams_from_a_generator(tmp_path):
+    class StreamingStore:
+        def items(self):
+            for i in range(1000):
+                yield f"G{i:05d}", {"seats": ["white", "black"], "moves": MOVES[:2]}
+
+    path = str(tmp_path / "games.jsonl.gz")
+    assert export_archive(StreamingStore(), path) == 1000
+    gid, record = next(read_archive(path))
+    assert gid == "G00000"
+    assert record["moves"] == MOVES[:2]
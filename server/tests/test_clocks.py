@@ -0,0 +1,205 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import clocks
+import modal_app
+from clocks import ClockScheduler
+from modal_app import create_web_app
+
+TEN_MINUTES = {"initialMs": 600_000, "incrementMs": 5_000}
+
+
+def test_clock_banks_elapsed_time_and_increment():
+    clock = clocks.new_clock(60_000, 1_000)
+    clocks.start(clock, 100.0)
+    assert clocks.wire(clock, "white", 104.5) == {"whiteMs": 55_500, "blackMs": 60_000}
+    clocks.press(clock, "white", 104.5)
+    assert clock["whiteMs"] == 56_500
+    assert clocks.deadline(clock, "black") == 164.5
+    assert clocks.remaining(clock, "black", 200.0) == 0
+    clocks.flag(clock, "black")
+    assert clock["flagged"] == "black"
+    assert clocks.wire(clock, "black", 300.0) == {"whiteMs": 56_500, "blackMs": 0}
+
+
+def test_scheduler_pops_due_games_in_deadline_order():
+    now = [0.0]
+
+    async def ignore(game_id):
+        pass
+
+    scheduler = ClockScheduler(ignore, now=lambda: now[0])
+    scheduler.schedule("A", 30.0)
+    scheduler.schedule("B", 10.0)
+    scheduler.schedule("C", 20.0)
+    scheduler.schedule("A", 5.0)  # moved earlier; the old entry goes stale
+    scheduler.schedule("C", 50.0)  # moved later
+    scheduler.cancel("B")
+    now[0] = 25.0
+    assert scheduler.due() == ["A"]
+    assert "C" in scheduler and len(scheduler) == 1
+    now[0] = 60.0
+    assert scheduler.due() == ["C"]
+    assert scheduler.due() == []
+
+
+def test_stale_entries_are_compacted():
+    async def ignore(game_id):
+        pass
+
+    scheduler = ClockScheduler(ignore, now=lambda: 0.0)
+    for i in range(1000):
+        scheduler.schedule("G", 100.0 + i)
+    assert len(scheduler._heap) <= 2 * len(scheduler) + 64
+
+
+def test_scheduler_task_wakes_for_an_earlier_deadline():
+    async def run():
+        fired = []
+        loop = asyncio.get_running_loop()
+
+        async def on_deadline(game_id):
+            fired.append((game_id, loop.time()))
+
+        scheduler = ClockScheduler(on_deadline, now=loop.time)
+        task = asyncio.create_task(scheduler.run())
+        scheduler.schedule("late", loop.time() + 60)
+        await asyncio.sleep(0)
+        started = loop.time()
+        scheduler.schedule("soon", loop.time() + 0.05)
+        await asyncio.sleep(0.2)
+        task.cancel()
+        assert [game_id for game_id, _ in fired] == ["soon"]
+        assert fired[0][1] - started < 0.15
+
+    asyncio.run(run())
+
+
+@pytest.fixture()
+def now():
+    return [1_000_000.0]
+
+
+@pytest.fixture()
+def client(now):
+    modal_app.connections.clear()
+    store = {}
+    with TestClient(create_web_app(store=store, time_source=lambda: now[0])) as c:
+        c.store = store
+        yield c
+
+
+def start_clocked_game(client, ws1, ws2, time_control=TEN_MINUTES):
+    ws1.send_json({"type": "create_game", "timeControl": time_control})
+    created = ws1.receive_json()
+    gid = created["gameId"]
+    ws2.send_json({"type": "join_game", "gameId": gid})
+    starts = {ws1: ws1.receive_json(), ws2: ws2.receive_json()}
+    white = ws1 if created["color"] == "white" else ws2
+    black = ws2 if white is ws1 else ws1
+    return gid, white, black, starts[white]
+
+
+def test_clock_runs_from_game_start_and_travels_with_moves(client, now):
+    with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+        gid, white, black, start = start_clocked_game(client, ws1, ws2)
+        assert start["clock"] == {"whiteMs": 600_000, "blackMs": 600_000}
+        now[0] += 12.5
+        white.send_json({"type": "move", "from": "Aa2", "to": "Aa3"})
+        made = black.receive_json()
+        assert white.receive_json() == made
+        assert made["clock"] == {"whiteMs": 592_500, "blackMs": 600_000}  # 600s - 12.5s + 5s
+        now[0] += 1
+        white.close()
+        with client.websocket_connect("/ws") as again:
+            again.send_json({"type": "rejoin_game", "gameId": gid, "color": "white"})
+            state = again.receive_json()
+        assert state["timeControl"] == TEN_MINUTES
+        assert state["clock"] == {"whiteMs": 592_500, "blackMs": 599_000}
+    stored = client.store[gid]["clock"]
+    assert stored["whiteMs"] == 592_500 and stored["flagged"] is None
+
+
+def test_moving_after_time_runs_out_loses_on_time(client, now):
+    with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+        gid, white, black, _ = start_clocked_game(client, ws1, ws2)
+        white.send_json({"type": "move", "from": "Aa2", "to": "Aa3"})
+        white.receive_json(), black.receive_json()
+        now[0] += 601
+        black.send_json({"type": "move", "from": "Ea4", "to": "Ea3"})
+        assert black.receive_json()["code"] == "game_over"
+        over = black.receive_json()
+        assert white.receive_json() == over
+        # White's banked time includes the increment from its one move
+        assert over == {
+            "type": "game_over",
+            "reason": "timeout",
+            "winner": "white",
+            "clock": {"whiteMs": 605_000, "blackMs": 0},
+        }
+        white.send_json({"type": "move", "from": "Aa3", "to": "Aa4"})
+        assert white.receive_json()["code"] == "wrong_turn"
+    assert client.store[gid]["clock"]["flagged"] == "black"
+    assert len(client.store[gid]["moves"]) == 1
+
+
+def test_off_turn_move_still_announces_the_flag(client, now):
+    with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+        gid, white, black, _ = start_clocked_game(client, ws1, ws2)
+        now[0] += 601
+        # White's time ran out on White's turn; Black's move finds it
+        black.send_json({"type": "move", "from": "Ea4", "to": "Ea3"})
+        assert black.receive_json()["code"] == "wrong_turn"
+        over = black.receive_json()
+        assert over["type"] == "game_over" and over["winner"] == "black"
+        assert white.receive_json() == over
+    assert client.store[gid]["clock"]["flagged"] == "white"
+    assert client.store[gid]["moves"] == []
+
+
+def test_capturing_a_king_does_not_break_a_timed_game(client, now):
+    with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+        gid, white, black, _ = start_clocked_game(client, ws1, ws2)
+        # Shape-valid and on turn, so accepted, though the rules can't judge the result
+        white.send_json({"type": "move", "from": "Aa1", "to": "Ec5"})
+        made = white.receive_json()
+        assert made["type"] == "move_made"
+        assert black.receive_json() == made
+    assert client.store[gid]["moves"] == [{"by": "white", "from": "Aa1", "to": "Ec5"}]
+    assert client.store[gid]["clock"]["runningSince"] == now[0]
+
+
+def test_moves_after_the_clock_stops_are_refused(client, now):
+    with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+        gid, white, black, _ = start_clocked_game(client, ws1, ws2)
+        # As if the last move had mated: the clock is frozen
+        clocks.stop(client.store[gid]["clock"])
+        now[0] += 30
+        white.send_json({"type": "move", "from": "Aa2", "to": "Aa3"})
+        assert white.receive_json()["code"] == "game_over"
+    clock = client.store[gid]["clock"]
+    assert clock["runningSince"] is None and clock["whiteMs"] == 600_000
+    assert client.store[gid]["moves"] == []
+
+
+def test_scheduler_flags_an_idle_player():
+    modal_app.connections.clear()
+    with TestClient(create_web_app(store={})) as client:
+        with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+            _, white, black, _ = start_clocked_game(client, ws1, ws2, {"initialMs": 1000, "incrementMs": 0})
+            # Nobody moves; White's flag falls about a second later
+            over = white.receive_json()
+            assert over["type"] == "game_over"
+            assert over["winner"] == "black"
+            assert black.receive_json() == over
+
+
+def test_games_without_a_time_control_have_no_clock(client):
+    with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+        ws1.send_json({"type": "create_game"})
+        gid = ws1.receive_json()["gameId"]
+        ws2.send_json({"type": "join_game", "gameId": gid})
+        assert "clock" not in ws1.receive_json()
+        assert "clock" not in client.store[gid]
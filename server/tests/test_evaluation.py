@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+import evaluation
+from evaluation import MOBILITY, evaluate, evaluate_batch
+from rules import EMPTY, apply_move, legal_moves, opponent, square, starting_position
+
+
+def random_positions(count, seed=3):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board, side = starting_position(), "white"
+        for _ in range(80):
+            moves = legal_moves(board, side)
+            if not moves:
+                break
+            board = apply_move(board, rng.choice(moves))
+            side = opponent(side)
+            positions.append(board)
+    return positions[:count]
+
+
+def test_starting_position_is_level():
+    assert evaluate(starting_position()) == 0
+
+
+def test_mobility_counts_open_first_steps():
+    # A rook in the corner has three directions; blocking one by its own
+    # piece costs one step, blocking one by an enemy costs nothing.
+    board = [EMPTY] * 125
+    board[square("Aa1")] = "R"
+    alone = evaluate(board)
+    board[square("Ab1")] = "P"
+    with_own = evaluate(board) - evaluate([p if p != "R" else EMPTY for p in board])
+    assert with_own == alone - MOBILITY
+    board[square("Ab1")] = "p"
+    with_enemy = evaluate(board) - evaluate([p if p != "R" else EMPTY for p in board])
+    assert with_enemy == alone
+
+
+def test_batch_matches_scalar():
+    pytest.importorskip("numpy")
+    positions = random_positions(300)
+    assert evaluate_batch(positions) == [evaluate(p) for p in positions]
+    assert evaluate_batch(positions, chunk_size=7) == [evaluate(p) for p in positions]
+
+
+def test_batch_falls_back_without_numpy(monkeypatch):
+    positions = random_positions(20)
+    monkeypatch.setattr(evaluation, "np", None)
+    assert evaluate_batch(positions) == [evaluate(p) for p in positions]
@@ -0,0 +1,74 @@
+import asyncio
+
+from heartbeat import Heartbeat, TimerWheel
+
+
+def advance(wheel, ticks):
+    fired = []
+    for _ in range(ticks):
+        fired.extend(wheel.advance())
+    return fired
+
+
+def test_fires_after_requested_ticks():
+    wheel = TimerWheel(slots=8)
+    wheel.schedule("a", 3, "A")
+    assert advance(wheel, 2) == []
+    assert advance(wheel, 1) == ["A"]
+    assert "a" not in wheel
+
+
+def test_deadlines_beyond_one_lap_wait_for_their_lap():
+    wheel = TimerWheel(slots=4)
+    wheel.schedule("far", 10, "far")
+    wheel.schedule("near", 2, "near")
+    assert advance(wheel, 2) == ["near"]
+    # Slot 10 % 4 == 2 was visited at tick 2 and 6 without firing "far"
+    assert advance(wheel, 7) == []
+    assert advance(wheel, 1) == ["far"]
+
+
+def test_reschedule_replaces_and_cancel_removes():
+    wheel = TimerWheel(slots=8)
+    wheel.schedule("a", 1, "first")
+    wheel.schedule("a", 5, "second")
+    wheel.schedule("b", 2, "b")
+    wheel.cancel("b")
+    assert len(wheel) == 1
+    assert advance(wheel, 5) == ["second"]
+    assert len(wheel) == 0
+
+
+class FakeSocket:
+    def __init__(self, hang=False):
+        self.hang = hang
+        self.pings = 0
+        self.closed = False
+
+    async def send_json(self, payload):
+        if self.hang:
+            await asyncio.Event().wait()  # a dead peer's full send buffer
+        self.pings += 1
+
+    async def close(self):
+        if self.hang:
+            await asyncio.Event().wait()  # no close handshake ever comes back
+        self.closed = True
+
+
+def test_a_hung_peer_does_not_stall_the_others():
+    async def run():
+        heartbeat = Heartbeat(interval=0.02, timeout=0.02, ping={"type": "ping"}, tick=0.01)
+        dead, alive = FakeSocket(hang=True), FakeSocket()
+        detached = []
+        heartbeat.watch(dead, lambda: detached.append(dead))
+        task = asyncio.create_task(heartbeat.run())
+        await asyncio.sleep(0.03)
+        # Joins after the dead peer's ping is already stuck
+        heartbeat.watch(alive, lambda: detached.append(alive))
+        await asyncio.sleep(0.15)
+        task.cancel()
+        assert detached[0] is dead and len(heartbeat) == 0
+        assert alive.pings == 1 and alive.closed
+
+    asyncio.run(run())
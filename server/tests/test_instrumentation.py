@@ -0,0 +1,123 @@
+"""Runtime instrumentation: loop lag, slow handlers, sampling profiler."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import WebSocket
+from fastapi.testclient import TestClient
+
+import modal_app
+from modal_app import create_web_app
+
+TOKEN = {"Authorization": "Bearer s3cret"}
+
+
+class SlowStore(dict):
+    """A store whose writes block the event loop, like a slow modal.Dict call."""
+
+    delay = 0.0
+
+    def __setitem__(self, key, value):
+        time.sleep(self.delay)
+        super().__setitem__(key, value)
+
+
+@pytest.fixture()
+def store():
+    return SlowStore()
+
+
+@pytest.fixture()
+def client(store):
+    modal_app.connections.clear()
+    with TestClient(create_web_app(store=store, debug_token="s3cret")) as c:
+        yield c
+    modal_app.connections.clear()
+
+
+def test_debug_routes_need_the_token(store):
+    with TestClient(create_web_app(store=store)) as c:
+        assert c.get("/debug/instrumentation", headers=TOKEN).status_code == 404
+    with TestClient(create_web_app(store=store, debug_token="s3cret")) as c:
+        assert c.get("/debug/instrumentation").status_code == 401
+        assert c.get("/debug/instrumentation", headers={"Authorization": "Bearer nope"}).status_code == 401
+        assert c.get("/debug/instrumentation", headers=TOKEN).status_code == 200
+
+
+def test_slow_handlers_are_recorded_with_type_and_game(client, store):
+    store.delay = 0.03
+    resp = client.patch("/debug/instrumentation", json={"slowHandlerMs": 20}, headers=TOKEN)
+    assert resp.json()["slowHandlerMs"] == 20
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "create_game"})
+        gid = ws.receive_json()["gameId"]
+        ws.send_json({"type": "create_game"})  # rejected without a store write
+        ws.receive_json()
+    slow = client.get("/debug/instrumentation", headers=TOKEN).json()["slowHandlers"]
+    # Recorded with the game the frame created
+    assert [(h["type"], h["gameId"]) for h in slow] == [("create_game", gid)]
+    assert slow[0]["ms"] >= 20
+    assert gid in store
+
+
+def test_time_suspended_in_sends_is_not_counted(client, monkeypatch):
+    send_json = WebSocket.send_json
+
+    async def slow_send_json(self, data, mode="text"):
+        await asyncio.sleep(0.1)  # the loop is free meanwhile
+        await send_json(self, data, mode)
+
+    monkeypatch.setattr(WebSocket, "send_json", slow_send_json)
+    client.patch("/debug/instrumentation", json={"slowHandlerMs": 50}, headers=TOKEN)
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "create_game"})
+        ws.receive_json()
+    assert client.get("/debug/instrumentation", headers=TOKEN).json()["slowHandlers"] == []
+
+
+def test_loop_lag_is_measured(client, store):
+    client.patch("/debug/instrumentation", json={"lagIntervalMs": 5}, headers=TOKEN)
+    store.delay = 0.1
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "create_game"})
+        ws.receive_json()
+    time.sleep(0.05)
+    lag = client.get("/debug/instrumentation", headers=TOKEN).json()["lag"]
+    assert lag["samples"] > 0
+    assert lag["maxMs"] >= 50
+
+    # Switched off at runtime
+    off = client.patch("/debug/instrumentation", json={"lagIntervalMs": None}, headers=TOKEN).json()
+    assert off["lagIntervalMs"] is None
+    assert off["lag"]["samples"] == 0
+
+
+def test_sampling_profiler_writes_folded_stacks(client, store):
+    resp = client.patch("/debug/instrumentation", json={"profilerIntervalMs": 1}, headers=TOKEN)
+    assert resp.json()["profiler"]["running"] is True
+    store.delay = 0.1
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "create_game"})
+        ws.receive_json()
+    resp = client.patch("/debug/instrumentation", json={"profilerIntervalMs": None}, headers=TOKEN)
+    assert resp.json()["profiler"]["running"] is False
+
+    folded = client.get("/debug/profile", headers=TOKEN).text
+    lines = folded.splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    # The blocking store write shows up inside the websocket handler
+    assert any("modal_app:ws_endpoint;" in line and line.endswith(f"__setitem__ {line.rsplit(' ', 1)[1]}") for line in lines)
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [{"profilerIntervalMs": 0}, {"lagIntervalMs": 0}, {"lagIntervalMs": -5}, {"slowHandlerMs": 0}],
+)
+def test_settings_that_would_spin_are_rejected(client, settings):
+    assert client.patch("/debug/instrumentation", json=settings, headers=TOKEN).status_code == 422
+    state = client.get("/debug/instrumentation", headers=TOKEN).json()
+    assert state["profiler"]["running"] is False
+    assert state["lagIntervalMs"] == 250
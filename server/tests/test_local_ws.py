@@ -6,13 +6,17 @@ and rejoin without needing Modal credentials. The durable store is a plain
 dict here; production passes a modal.Dict with the same access patterns.
 """
 
+import json
 import time
+import zlib
 
 import pytest
+from fastapi import WebSocketDisconnect
 from fastapi.testclient import TestClient
 
 import modal_app
 from modal_app import create_web_app
+from rules import starting_position
 
 
 @pytest.fixture()
@@ -352,3 +356,214 @@ def test_rejoin_replaces_lingering_socket(client, creator_is_white):
             ws_new.send_json({"type": "move", "from": "Aa2", "to": "Aa3"})
             assert ws_new.receive_json()["type"] == "move_made"
             assert ws2.receive_json()["type"] == "move_made"
+
+
+@pytest.fixture()
+def fast_heartbeat_client(store):
+    modal_app.connections.clear()
+    app = create_web_app(store=store, heartbeat_interval=0.05, heartbeat_timeout=0.05)
+    with TestClient(app) as c:
+        yield c
+    modal_app.connections.clear()
+
+
+def test_heartbeat_pings_idle_socket_and_pong_keeps_it(fast_heartbeat_client):
+    client = fast_heartbeat_client
+    with client.websocket_connect("/ws") as ws:
+        gid, color = create_game(ws)
+        for _ in range(3):
+            assert ws.receive_json() == {"type": "ping"}
+            ws.send_json({"type": "pong"})
+        assert modal_app.connections[gid][color] is not None
+        # Still a working game connection after several heartbeats
+        ws.send_json({"type": "create_game"})
+        msg = ws.receive_json()
+        while msg["type"] == "ping":
+            msg = ws.receive_json()
+        assert msg["code"] == "already_in_game"
+
+
+def test_heartbeat_closes_unresponsive_socket(fast_heartbeat_client, store):
+    client = fast_heartbeat_client
+    with client.websocket_connect("/ws") as ws:
+        gid, _ = create_game(ws)
+        assert ws.receive_json() == {"type": "ping"}
+        # No pong: the server gives up, detaches the seat, and closes
+        assert wait_until(lambda: gid not in modal_app.connections)
+        with pytest.raises(WebSocketDisconnect):
+            ws.receive_json()
+    # The durable record survives so the player can rejoin
+    assert gid in store
+
+
+def test_clients_may_not_send_ping(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json()["code"] == "invalid_message"
+
+
+@pytest.fixture()
+def limited_client(store):
+    modal_app.connections.clear()
+    app = create_web_app(store=store, connection_rate_limit=(0.001, 5), game_rate_limit=(0.001, 8))
+    with TestClient(app) as c:
+        yield c
+    modal_app.connections.clear()
+
+
+def test_flooding_socket_is_closed_before_validation(limited_client, monkeypatch):
+    validated = []
+    original = modal_app.WebsocketV1MessageEnvelope.model_validate
+    monkeypatch.setattr(
+        modal_app.WebsocketV1MessageEnvelope,
+        "model_validate",
+        lambda data: validated.append(data) or original(data),
+    )
+    with limited_client.websocket_connect("/ws") as ws:
+        for _ in range(5):
+            ws.send_text("this is not json {")
+            assert ws.receive_json()["code"] == "invalid_message"
+        ws.send_json({"type": "bogus"})
+        with pytest.raises(WebSocketDisconnect) as info:
+            ws.receive_json()
+        assert info.value.code == 1008
+    # The over-limit frame never reached schema validation
+    assert validated == []
+
+
+def test_game_budget_is_shared_by_both_seats(store):
+    app = create_web_app(store=store, connection_rate_limit=(0.001, 20), game_rate_limit=(0.001, 4))
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+            gid, white_ws, black_ws = start_game(ws1, ws2)
+            # create/join happen before either socket belongs to the game, so
+            # the game's full burst of 4 remains, split across both seats.
+            for ws in (white_ws, black_ws) * 2:
+                ws.send_json({"type": "create_game"})
+                assert ws.receive_json()["code"] == "already_in_game"
+            white_ws.send_json({"type": "move", "from": "Aa2", "to": "Aa3"})
+            assert white_ws.receive_json()["code"] == "rate_limited"
+            # Refused, not disconnected: each socket is within its own limit
+            assert modal_app.connections[gid].keys() == {"white", "black"}
+        assert wait_until(lambda: gid not in modal_app.game_buckets)
+
+
+def test_moves_are_snapshotted_every_interval(store):
+    app = create_web_app(store=store, snapshot_interval=2)
+    shuffle = [("Ab1", "Ac3"), ("Eb5", "Ec3"), ("Ac3", "Ab1"), ("Ec3", "Eb5"), ("Ab1", "Ac3")]
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+            gid, white_ws, black_ws = start_game(ws1, ws2)
+            for i, (frm, to) in enumerate(shuffle):
+                mover = white_ws if i % 2 == 0 else black_ws
+                mover.send_json({"type": "move", "from": frm, "to": to})
+                white_ws.receive_json()
+                black_ws.receive_json()
+    snapshots = store[gid]["snapshots"]
+    assert [ply for ply, _ in snapshots] == [2, 4]
+    # Four knight hops later, both knights are home again
+    assert snapshots[1][1] == "".join(starting_position())
+
+
+@pytest.mark.parametrize("interval", [0, None])
+def test_snapshots_can_be_switched_off(store, interval):
+    with TestClient(create_web_app(store=store, snapshot_interval=interval)) as client:
+        with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+            gid, white_ws, black_ws = start_game(ws1, ws2)
+            white_ws.send_json({"type": "move", "from": "Ab1", "to": "Ac3"})
+            assert white_ws.receive_json()["type"] == "move_made"
+            black_ws.receive_json()
+    assert "snapshots" not in store[gid]
+
+
+def test_find_game_pairs_waiting_players_in_arrival_order(client, store, creator_is_white):
+    with (
+        client.websocket_connect("/ws") as first,
+        client.websocket_connect("/ws") as second,
+        client.websocket_connect("/ws") as third,
+    ):
+        first.send_json({"type": "find_game"})
+        assert wait_until(lambda: len(modal_app.match_queue) == 1)
+        second.send_json({"type": "find_game"})
+        third.send_json({"type": "find_game"})
+        # The player who waited longest is seated (white, per the fixture)
+        created = first.receive_json()
+        assert created["type"] == "game_created"
+        assert created["color"] == "white"
+        gid = created["gameId"]
+        assert first.receive_json() == {"type": "game_start", "color": "white"}
+        assert second.receive_json() == {"type": "game_created", "gameId": gid, "color": "black"}
+        assert second.receive_json() == {"type": "game_start", "color": "black"}
+        assert store[gid] == {"seats": ["white", "black"], "moves": []}
+        # The third waits for the next arrival
+        assert wait_until(lambda: len(modal_app.match_queue) == 1)
+
+        # The paired game plays like any other, from both handlers
+        first.send_json({"type": "move", "from": "Aa2", "to": "Aa3"})
+        assert second.receive_json()["type"] == "move_made"
+        second.send_json({"type": "find_game"})
+        assert second.receive_json()["code"] == "already_in_game"
+    # Closing the waiting socket removes it from the queue
+    assert wait_until(lambda: not modal_app.match_queue)
+
+
+def test_seated_players_leave_the_match_queue(client):
+    with client.websocket_connect("/ws") as ws, client.websocket_connect("/ws") as other:
+        ws.send_json({"type": "find_game"})
+        assert wait_until(lambda: len(modal_app.match_queue) == 1)
+        create_game(ws)
+        assert not modal_app.match_queue
+        # A later searcher is not paired with a socket that is already seated
+        other.send_json({"type": "find_game"})
+        assert wait_until(lambda: len(modal_app.match_queue) == 1)
+
+
+def receive_frame(ws) -> list[dict]:
+    """One frame from a batching/compressing socket, as its list of messages."""
+    message = ws.receive()
+    text = message.get("text")
+    if text is None:
+        text = zlib.decompress(message["bytes"], -zlib.MAX_WBITS).decode()
+    payload = json.loads(text)
+    return payload if isinstance(payload, list) else [payload]
+
+
+def test_batching_sockets_get_one_frame_per_burst(client, creator_is_white):
+    with (
+        client.websocket_connect("/ws?batch=1") as first,
+        client.websocket_connect("/ws?batch=1") as second,
+    ):
+        first.send_json({"type": "find_game"})
+        assert wait_until(lambda: len(modal_app.match_queue) == 1)
+        second.send_json({"type": "find_game"})
+        # game_created and game_start were queued in the same tick
+        created, start = receive_frame(first)
+        assert (created["type"], start) == ("game_created", {"type": "game_start", "color": "white"})
+        assert [m["type"] for m in receive_frame(second)] == ["game_created", "game_start"]
+        # A lone message is still a plain object
+        first.send_json({"type": "move", "from": "Aa2", "to": "Aa3"})
+        assert first.receive_json()["type"] == "move_made"
+        assert second.receive_json()["type"] == "move_made"
+    assert wait_until(lambda: not modal_app.outboxes)
+
+
+def test_large_frames_are_compressed_for_clients_that_ask(store):
+    shuffle = [("Ab1", "Ac3", "white"), ("Eb5", "Ec3", "black"), ("Ac3", "Ab1", "white"), ("Ec3", "Eb5", "black")]
+    moves = [{"by": by, "from": frm, "to": to} for _ in range(50) for frm, to, by in shuffle]
+    store["LONG01"] = {"seats": ["white", "black"], "moves": list(moves)}
+    with TestClient(create_web_app(store=store, compression=(1024, 6))) as client:
+        with client.websocket_connect("/ws?compress=deflate-raw") as ws:
+            ws.send_json({"type": "rejoin_game", "gameId": "LONG01", "color": "white"})
+            message = ws.receive()
+            assert "bytes" in message
+            state = json.loads(zlib.decompress(message["bytes"], -zlib.MAX_WBITS))
+            assert state["type"] == "game_state"
+            assert state["moves"] == moves
+            assert len(message["bytes"]) * 10 < len(json.dumps(state))
+            # Small frames stay uncompressed text
+            ws.send_json({"type": "move", "from": "Aa2", "to": "Aa3"})
+            assert ws.receive_json()["type"] == "move_made"
+        # Without the query parameter the same history arrives as plain text
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "rejoin_game", "gameId": "LONG01", "color": "black"})
+            assert ws.receive_json()["moves"][:200] == moves
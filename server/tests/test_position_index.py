@@ -0,0 +1,133 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import modal_app
+from archive import decode_moves, write_archive
+from modal_app import create_web_app
+from position_index import IndexWriter, PositionIndex, PositionStats, decode_move, encode_move, main
+from rules import PROMOTIONS, Move, apply_move, move_from_record, position_hash, square, starting_position
+
+START = position_hash(starting_position(), "white")
+
+
+@pytest.fixture()
+def index(tmp_path):
+    with PositionIndex(str(tmp_path / "index.bin"), capacity=8, continuations=2) as idx:
+        yield idx
+
+
+def test_move_codes_round_trip():
+    for promotion in (None, *PROMOTIONS):
+        move = Move(square("Db4"), square("Eb5"), promotion)
+        assert decode_move(encode_move(move)) == move
+    assert encode_move(Move(0, 0)) != 0
+
+
+def test_counts_continuations_and_overflow(index):
+    a, b, c = (move_from_record(m) for m in decode_moves("Aa2Aa3 Ab2Ab3 Ac2Ac3"))
+    for move in (a, b, b, b, c):
+        index.add(START, move)
+    stats = index.lookup(START)
+    # Only two continuation slots: the third distinct move takes the least
+    # played one's, counting on from it (an upper bound)
+    assert stats.total == 5
+    assert stats.continuations == [(b, 3), (c, 2)]
+    assert index.lookup(START ^ 1) is None
+
+
+def test_a_popular_late_move_displaces_one_offs(tmp_path):
+    with PositionIndex(str(tmp_path / "index.bin"), capacity=8, continuations=8) as index:
+        for to in range(8):
+            index.add(START, Move(100, to))
+        popular = Move(square("Aa2"), square("Aa3"))
+        for _ in range(1000):
+            index.add(START, popular)
+        stats = index.lookup(START)
+        assert stats.total == 1008
+        assert stats.continuations[0] == (popular, 1001)
+        assert len(stats.continuations) == 8
+
+
+def test_transpositions_share_an_entry(index):
+    # Two move orders reaching the same position
+    index.add_game(decode_moves("Ab1Ac3 Eb5Ec3 Ad1Ae3 Ed5Ee3 Ac2Ac3"))
+    index.add_game(decode_moves("Ad1Ae3 Ed5Ee3 Ab1Ac3 Eb5Ec3 Ac2Ac4"))
+    board = starting_position()
+    for record in decode_moves("Ab1Ac3 Eb5Ec3 Ad1Ae3 Ed5Ee3"):
+        board = apply_move(board, move_from_record(record))
+    stats = index.stats(board, "white")
+    assert stats.total == 2
+    assert sorted(stats.continuations) == [(Move(square("Ac2"), square(to)), 1) for to in ("Ac3", "Ac4")]
+
+
+def test_growth_and_reopening_keep_every_entry(tmp_path):
+    path = str(tmp_path / "index.bin")
+    move = Move(0, 1)
+    with PositionIndex(path, capacity=4) as idx:
+        for key in range(1, 101):
+            idx.add(key * 0x9E3779B97F4A7C15 % (1 << 64), move)
+        assert idx.capacity >= 100 / 0.7
+    with PositionIndex(path) as idx:
+        assert len(idx) == 100
+        assert all(idx.lookup(key * 0x9E3779B97F4A7C15 % (1 << 64)).total == 1 for key in range(1, 101))
+
+
+def test_unreplayable_games_stop_at_the_bad_move(index):
+    assert index.add_game(decode_moves("Aa2Aa3 Cc3Cc4 Aa3Aa4")) == 1
+
+
+def test_build_and_show_cli(tmp_path, capsys):
+    archive = str(tmp_path / "games.jsonl.gz")
+    games = [(f"G{i}", {"seats": ["white", "black"], "moves": decode_moves("Aa2Aa3 Ea4Ea3")}) for i in range(3)]
+    write_archive(games, archive)
+    path = str(tmp_path / "index.bin")
+    main(["build", path, archive])
+    assert "indexed 6 moves from 3 games; 2 distinct positions" in capsys.readouterr().out
+    main(["show", path, "Aa2Aa3"])
+    assert capsys.readouterr().out.splitlines() == ["played from 3 times", "  Ea4Ea3  3"]
+
+
+def test_writer_applies_adds_in_order_off_the_calling_thread(tmp_path):
+    with PositionIndex(str(tmp_path / "grow.bin"), capacity=8) as index:
+        writer = IndexWriter(index)
+        writer.start()
+        for key in range(1, 101):
+            writer.add(key, Move(0, 1))
+        writer.add(7, Move(2, 3))
+        writer.close()
+        assert len(index) == 100  # grew past capacity on the writer thread
+        assert index.lookup(7) == PositionStats(2, [(Move(0, 1), 1), (Move(2, 3), 1)])
+
+
+def test_accepted_moves_feed_the_index(index, monkeypatch):
+    modal_app.connections.clear()
+    store = {}
+    add = index.add
+    threads = set()
+
+    def recording_add(key, move):
+        threads.add(threading.current_thread().name)
+        add(key, move)
+
+    monkeypatch.setattr(index, "add", recording_add)
+    with TestClient(create_web_app(store=store, position_index=index)) as client:
+        for _ in range(2):
+            with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+                ws1.send_json({"type": "create_game"})
+                gid = ws1.receive_json()["gameId"]
+                ws2.send_json({"type": "join_game", "gameId": gid})
+                white = ws1 if ws1.receive_json()["color"] == "white" else ws2
+                black = ws2 if white is ws1 else ws1
+                ws2.receive_json()
+                for ws, frm, to in ((white, "Aa2", "Aa3"), (black, "Ea4", "Ea3")):
+                    ws.send_json({"type": "move", "from": frm, "to": to})
+                    white.receive_json()
+                    black.receive_json()
+    stats = index.lookup(START)
+    assert stats.total == 2
+    assert stats.continuations == [(Move(square("Aa2"), square("Aa3")), 2)]
+    assert len(index) == 2
+    # Written by the background writer, never on the event loop
+    assert threads == {"position-index-writer"}
@@ -0,0 +1,16 @@
+from ratelimit import TokenBucket
+
+
+def test_bucket_allows_burst_then_refills_at_rate():
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    now = bucket.updated
+    assert [bucket.take(now) for _ in range(4)] == [True, True, True, False]
+    # Half a second at 2/s buys exactly one more frame
+    assert bucket.take(now + 0.5) is True
+    assert bucket.take(now + 0.5) is False
+
+
+def test_bucket_never_exceeds_capacity():
+    bucket = TokenBucket(rate=100.0, capacity=2)
+    later = bucket.updated + 60
+    assert [bucket.take(later) for _ in range(3)] == [True, True, False]
@@ -0,0 +1,89 @@
+"""Rules-engine cases ported from client/src/engine/board.test.ts."""
+
+import pytest
+
+from rules import (
+    EMPTY,
+    IllegalMove,
+    Move,
+    apply_move,
+    in_check,
+    index,
+    is_checkmate,
+    legal_moves,
+    legal_moves_from,
+    potential_moves,
+    replay,
+    square,
+    square_name,
+    starting_position,
+)
+
+
+def empty_board(**pieces):
+    board = [EMPTY] * 125
+    for name, piece in pieces.items():
+        board[square(name)] = piece
+    return board
+
+
+def test_square_names_round_trip():
+    assert square("Aa1") == 0
+    assert square_name(square("Ee5")) == "Ee5"
+    assert square("Cb4") == index(1, 3, 2)
+    with pytest.raises(ValueError):
+        square("Zz9")
+
+
+def test_rook_from_center_has_twelve_moves():
+    board = empty_board(Cc3="R")
+    assert len(list(potential_moves(board, square("Cc3")))) == 12
+
+
+def test_knight_from_corner():
+    board = empty_board(Aa1="N")
+    targets = sorted(square_name(m.to) for m in potential_moves(board, square("Aa1")))
+    assert targets == sorted(["Ab3", "Ac2", "Ba3", "Bc1", "Ca2", "Cb1"])
+
+
+def test_white_pawn_promotes_to_every_piece_on_top_last_rank():
+    board = empty_board(Ea4="P")
+    moves = list(potential_moves(board, square("Ea4")))
+    assert sorted(m.promotion for m in moves) == sorted(["Q", "R", "B", "N", "U"])
+    with pytest.raises(IllegalMove):
+        apply_move(board, Move(square("Ea4"), square("Ea5")))
+
+
+def test_pinned_rook_only_moves_along_the_pin():
+    board = empty_board(Aa1="K", Ba1="R", Ea1="r", Ee5="k")
+    for move in legal_moves_from(board, square("Ba1")):
+        assert square_name(move.to)[1:] == "a1"
+
+
+def test_corner_mate():
+    # A queen on the king's space diagonal covers all seven escape squares;
+    # the white king guards her.
+    board = empty_board(Ee5="k", Dd4="Q", Cc3="K")
+    assert is_checkmate(board, "black")
+    board[square("Cc3")] = EMPTY
+    board[square("Aa1")] = "K"
+    assert in_check(board, "black")
+    assert not is_checkmate(board, "black")  # the king takes the queen
+
+
+def test_starting_position_is_symmetric():
+    board = starting_position()
+    assert len(legal_moves(board, "white")) == len(legal_moves(board, "black"))
+    assert not in_check(board, "white")
+
+
+def test_replay_reports_first_illegal_ply():
+    moves = [
+        {"by": "white", "from": "Aa2", "to": "Aa3"},
+        {"by": "black", "from": "Ea4", "to": "Ea3"},
+        {"by": "white", "from": "Aa1", "to": "Ab2"},  # rook can't move diagonally
+    ]
+    with pytest.raises(IllegalMove) as info:
+        replay(moves)
+    assert info.value.ply == 2
+    assert "cannot move" in str(info.value)
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from rules import IllegalMove, apply_move, legal_moves, move_to_record, opponent, starting_position
+from snapshots import decode_board, encode_board, maybe_snapshot, position_at
+
+
+def random_game(plies, seed=7):
+    rng = random.Random(seed)
+    board, side, moves = starting_position(), "white", []
+    for _ in range(plies):
+        choices = legal_moves(board, side)
+        if not choices:
+            break
+        move = rng.choice(choices)
+        moves.append(move_to_record(move, side))
+        board = apply_move(board, move)
+        side = opponent(side)
+    return moves, board
+
+
+def build_record(moves, interval):
+    record = {"seats": ["white", "black"], "moves": []}
+    for move in moves:
+        record["moves"].append(move)
+        maybe_snapshot(record, interval)
+    return record
+
+
+def test_board_encoding_round_trips():
+    board = starting_position()
+    text = encode_board(board)
+    assert len(text) == 125
+    assert decode_board(text) == board
+
+
+def test_snapshots_land_on_the_interval_and_match_full_replay():
+    moves, final = random_game(40)
+    record = build_record(moves, interval=8)
+    assert [ply for ply, _ in record["snapshots"]] == list(range(8, len(moves) + 1, 8))
+    assert position_at(record) == final
+    for ply in range(len(moves) + 1):
+        assert position_at(record, ply) == position_at({"moves": moves}, ply)
+
+
+def test_reconstruction_starts_from_the_latest_snapshot():
+    moves, final = random_game(20)
+    record = build_record(moves, interval=8)
+    # Garbage before the last snapshot is never replayed
+    record["moves"][:16] = [{"by": "white", "from": "Cc3", "to": "Cc4"}] * 16
+    assert position_at(record) == final
+
+
+def test_unreplayable_records_report_the_ply():
+    moves, _ = random_game(6)
+    moves[3] = {"by": "black", "from": "Cc3", "to": "Cc4"}  # empty square
+    record = build_record(moves, interval=2)
+    assert [ply for ply, _ in record["snapshots"]] == [2]
+    with pytest.raises(IllegalMove) as info:
+        position_at(record)
+    assert info.value.ply == 3
@@ -0,0 +1,48 @@
+import json
+
+from archive import encode_record, export_archive
+from validate import main, validate_lines, validate_record, validate_store
+
+GOOD = {
+    "seats": ["white", "black"],
+    "moves": [
+        {"by": "white", "from": "Aa2", "to": "Aa3"},
+        {"by": "black", "from": "Ea4", "to": "Ea3"},
+    ],
+}
+BAD = {
+    "seats": ["white", "black"],
+    "moves": [
+        {"by": "white", "from": "Aa2", "to": "Aa3"},
+        {"by": "black", "from": "Aa3", "to": "Aa4"},  # black moving a white pawn
+    ],
+}
+
+
+def test_validate_record():
+    assert validate_record("GOOD01", GOOD) is None
+    report = validate_record("BAD001", BAD)
+    assert report["id"] == "BAD001"
+    assert report["ply"] == 1
+    assert report["move"] == BAD["moves"][1]
+
+
+def test_process_pool_reports_only_broken_games():
+    lines = [encode_record(f"G{i:04d}", BAD if i % 7 == 0 else GOOD) for i in range(200)]
+    reports = list(validate_lines(lines, workers=2, chunk_size=8))
+    assert sorted(r["id"] for r in reports) == [f"G{i:04d}" for i in range(0, 200, 7)]
+    assert all(r["ply"] == 1 for r in reports)
+
+
+def test_validate_store():
+    reports = list(validate_store({"GOOD01": GOOD, "BAD001": BAD}, workers=1))
+    assert [r["id"] for r in reports] == ["BAD001"]
+
+
+def test_cli_streams_reports_from_an_archive(tmp_path, capsys):
+    path = str(tmp_path / "games.jsonl.gz")
+    export_archive({"GOOD01": GOOD, "BAD001": BAD}, path)
+    main(["--archive", path, "--workers", "1"])
+    out, err = capsys.readouterr()
+    assert [json.loads(line)["id"] for line in out.splitlines()] == ["BAD001"]
+    assert "checked 2 games, 1 with an illegal move" in err
@@ -0,0 +1,36 @@
+"""The seeded websocket fuzzer (benchmarks/ws_fuzz.py) as a regression test.
+
+Each seed drives simulated clients through create/join/rejoin/find/move/
+disconnect sequences in-process and checks the invariants listed in the
+harness; a failure message names the seed and the last actions, and
+``python -m benchmarks.ws_fuzz --seed N`` replays it.
+"""
+
+import asyncio
+
+import pytest
+
+from benchmarks.ws_fuzz import LatentStore, fuzz
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_invariants_hold_under_random_interleavings(seed):
+    report = asyncio.run(fuzz(seed, clients=24, rounds=120))
+    assert report.games > 0
+    assert report.moves > 0
+
+
+def test_same_seed_replays_the_same_run():
+    first = asyncio.run(fuzz(11, clients=12, rounds=80))
+    second = asyncio.run(fuzz(11, clients=12, rounds=80))
+    assert first.digest == second.digest
+    assert (first.frames_in, first.messages_out) == (second.frames_in, second.messages_out)
+
+
+def test_latent_store_hands_out_copies():
+    store = LatentStore()
+    store["G"] = {"moves": []}
+    store["G"]["moves"].append("lost")
+    record = store.get("G")
+    record["moves"].append("also lost")
+    assert store["G"] == {"moves": []}
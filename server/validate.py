@@ -0,0 +1,121 @@
+"""Replay stored games against the rules engine and report illegal records.
+
+The server accepts any shape-valid, turn-correct move, so the store may hold
+games the client can only show frozen at the last good position. This tool
+replays every game (from the live store or an archive) with rules.py and
+prints one JSON line per broken game, naming its first illegal ply.
+
+Records travel to a process pool as compact archive lines in fixed-size
+chunks, with a bounded number of chunks in flight: workers stay saturated,
+pickling stays cheap, and memory stays flat however large the input is.
+Results stream out as chunks finish, so output order is not input order.
+
+Usage:
+
+    python validate.py                          # the deployed store (needs Modal credentials)
+    python validate.py --archive games.jsonl.gz
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Iterable, Iterator
+
+from archive import decode_record, encode_record, iter_records, read_lines
+from rules import IllegalMove, replay
+
+
+def validate_record(gid: str, record: dict) -> dict | None:
+    """Return a report for the first illegal ply, or None if the game replays."""
+    try:
+        replay(record["moves"])
+    except IllegalMove as exc:
+        return {"id": gid, "ply": exc.ply, "move": record["moves"][exc.ply], "reason": str(exc)}
+    return None
+
+
+def _validate_lines(lines: list[str]) -> list[dict]:
+    # Runs in a worker process; decoding happens here, not in the parent.
+    reports = []
+    for line in lines:
+        report = validate_record(*decode_record(line))
+        if report is not None:
+            reports.append(report)
+    return reports
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[list[str]]:
+    it = iter(lines)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def validate_lines(
+    lines: Iterable[str], *, workers: int | None = None, chunk_size: int = 64
+) -> Iterator[dict]:
+    """Yield a report for every illegal game among encoded archive lines.
+
+    At most ``4 * workers`` chunks are submitted ahead of the results being
+    consumed, so a slow consumer or a huge input can't queue the whole
+    dataset in the pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 4 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight: set[Future] = set()
+        for chunk in _chunks(lines, chunk_size):
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            in_flight.add(pool.submit(_validate_lines, chunk))
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def validate_store(store, **kwargs) -> Iterator[dict]:
+    return validate_lines((encode_record(gid, record) for gid, record in iter_records(store)), **kwargs)
+
+
+def validate_archive(path: str, **kwargs) -> Iterator[dict]:
+    return validate_lines(read_lines(path), **kwargs)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive", help="validate this archive instead of the live store")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="games per unit of work")
+    args = parser.parse_args(argv)
+
+    checked = 0
+
+    def counted(lines: Iterable[str]) -> Iterator[str]:
+        nonlocal checked
+        for line in lines:
+            checked += 1
+            yield line
+
+    if args.archive:
+        lines = read_lines(args.archive)
+    else:
+        import modal
+        from modal_app import STORE_NAME
+
+        store = modal.Dict.from_name(STORE_NAME, create_if_missing=True)
+        lines = (encode_record(gid, record) for gid, record in iter_records(store))
+
+    broken = 0
+    for report in validate_lines(counted(lines), workers=args.workers, chunk_size=args.chunk_size):
+        broken += 1
+        print(json.dumps(report), flush=True)
+    print(f"checked {checked} games, {broken} with an illegal move", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()